@@ -1,19 +1,28 @@
-import itertools
+import functools
 import logging
-import operator
 import os
-import re
+import time
 import logging
 import aiohttp
-import aiosqlite
 import discord
-import configparser
 
+from collections import Counter
 from pathlib import Path
 from discord.ext import commands, ipc
+from discord.utils import maybe_coroutine
 from ext.shard import override_discord
 from utils.context import customContext
+from utils.bus import InvalidationBus
 from utils.cache import CacheManager
+from utils.config import Settings
+from utils.database import ReadPool, connect_writer
+from utils.disabled import DisabledCommands
+from utils.log import LogPipeline
+from utils.metrics import UsageAggregator
+from utils.migrations import Migrator
+from utils import queries
+from utils.writer import WriteBehind
+from utils.prefix import PrefixResolver
 from utils.useful import (Cooldown, ListCall, call,
                           print_exception)
 from utils.json import read_json
@@ -21,23 +30,81 @@ from utils.json import read_json
 to_call = ListCall()
 
 class GrootBot(commands.Bot):
+    FLAG_CACHES = {
+        "blacklisted_users": ("blacklisted", ("guild_config", "users_data")),
+        "premium_users": ("premium", ("guild_config", "users_data")),
+        "tips_are_on": ("tips", ("users_data",)),
+        "mentions_are_on": ("mentions", ("users_data",))
+    }
+
     def __init__(self, **kwargs):
         super().__init__(self.get_prefix, **kwargs)
         self.icons = {}
         self.colors = {}
-        self.non_sync = ["music", "core", "rtfm"]
+        self.non_sync = ["unlisted", "rtfm"]
         self.token = self.config.get('Groot', 'token')
         self.session = aiohttp.ClientSession()
         self.maintenance = False
         self.cache = CacheManager()
+        self.prefixes = PrefixResolver(self)
+        self.message_stats = Counter()
         self.ipc = ipc.Server(
             self, host="0.0.0.0", secret_key="GrootBotAdmin"
         )
         self.testers = [396805720353275924]
+        self.shutdown_hooks = ListCall()
+        self._closed = False
+        self.writes = WriteBehind(self)
+        self.usage = UsageAggregator(self)
+
+        self.bus = InvalidationBus(self)
+        for name in self.FLAG_CACHES:
+            self.bus.subscribe(name, functools.partial(self.refresh_flag, name))
+        self.bus.subscribe("prefixes", self.prefixes.refresh)
+        self.bus.subscribe("disabled_commands", self.refresh_disabled)
 
     async def after_db(self):
         """Runs after the db is connected"""
+        started = time.perf_counter()
+        self.migrator = Migrator(self.db, f"{self.cwd}/data/sql/migrations")
+        migrations = await self.migrator.run()
+        elapsed = time.perf_counter() - started
+
         await to_call.call(self)
+        if migrations:
+            self.logger.info(f"Applied migrations {', '.join(migrations)} in {elapsed * 1000:.1f}ms")
+
+    async def shutdown(self):
+        """
+        Runs the shutdown hooks (saving state, flushing buffers) and commits the database.
+        Only the first call does anything, a failing step doesn't keep the others from running.
+        """
+        if self._closed:
+            return
+        self._closed = True
+
+        for result in await self.shutdown_hooks.call(return_exceptions=True):
+            if isinstance(result, Exception):
+                print_exception("Ignoring exception in shutdown hook:", result)
+
+        steps = {
+            "flushing the usage counters": lambda: self.usage.flush(),
+            "closing the write queue": lambda: self.writes.close(),
+            "committing the database": lambda: self.db.commit(),
+            "closing the read pool": lambda: self.reads.close(),
+            "stopping the log pipeline": lambda: self.log_pipeline.stop()
+        }
+        for step, func in steps.items():
+            try:
+                await maybe_coroutine(func)
+            except Exception as e:
+                print_exception(f"Ignoring exception while {step}:", e)
+
+    async def close(self):
+        try:
+            await self.shutdown()
+        finally:
+            await super().close()
 
     def add_command(self, command):
         """Overwrite add_command to add a default cooldown to every command"""
@@ -62,9 +129,16 @@ class GrootBot(commands.Bot):
 
     @property
     def config(self):
-        config = configparser.ConfigParser()
-        config.read(f'{self.cwd}/config/config.ini')
-        return config
+        try:
+            return self._config
+        except AttributeError:
+            self._config = Settings.load(f'{self.cwd}/config/config.ini')
+            return self._config
+
+    def reload_config(self):
+        """Re-reads config.ini and swaps the settings in one go"""
+        self._config = self.config.reload()
+        return self._config
 
     @to_call.append
     def monkey_patch(self):
@@ -105,29 +179,23 @@ class GrootBot(commands.Bot):
 
     @to_call.append
     def setup_logging(self):
-        # Set up BOT logging
-        logger = logging.getLogger(__name__)
-        logger.setLevel(logging.DEBUG)
-
-        handler = logging.FileHandler(filename=f"{self.cwd}/config/logs/bot.log", encoding='utf-8')
-        formatter = logging.Formatter(
-            fmt='[{asctime}] {levelname:<10} | {name:<10}: {message}',
-            datefmt="%d-%b-%y %H:%M:%S",
-            style="{",
+        # Every record goes through a queue, the files are written (and rotated) by a background thread
+        config = self.config
+        self.log_pipeline = LogPipeline(
+            f"{self.cwd}/config/logs",
+            max_bytes=config.getint('Logging', 'max_bytes', fallback=5 * 1024 * 1024),
+            backup_count=config.getint('Logging', 'backup_count', fallback=5),
+            structured=config.getboolean('Logging', 'json', fallback=False),
+            sample_rate=config.getint('Logging', 'sample_rate', fallback=1)
         )
 
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
-        self.logger = logger
+        # Set up BOT logging
+        self.logger = self.log_pipeline.attach(logging.getLogger(__name__), "bot.log", level=logging.DEBUG)
 
         # Change discord's logging to WARNING and the handler
-        logger = logging.getLogger('discord')
-        logger.setLevel(logging.WARNING)
-
-        handler = logging.FileHandler(filename=f"{self.cwd}/config/logs/discord.log", encoding='utf-8')
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
+        self.log_pipeline.attach(logging.getLogger('discord'), "discord.log", level=logging.WARNING)
 
+        self.log_pipeline.start()
         return self.logger
 
     @to_call.append
@@ -147,42 +215,109 @@ class GrootBot(commands.Bot):
 
     @to_call.append
     async def fill_cache(self):
-        """Loading up the blacklisted users."""
-        query = 'SELECT * FROM (SELECT guild_id AS snowflake_id, blacklisted  FROM guild_config  UNION ALL SELECT user_id AS snowflake_id, blacklisted  FROM users_data) WHERE blacklisted="TRUE"'
-        cur = await self.db.execute(query)
-        data = await cur.fetchall()
-        self.cache["blacklisted_users"] = {r[0] for r in data} or set()
-
-        """Loading up premium users."""
-        query = 'SELECT * FROM (SELECT guild_id AS snowflake_id, premium  FROM guild_config  UNION ALL SELECT user_id AS snowflake_id, premium  FROM users_data) WHERE premium="TRUE"'
-        cur = await self.db.execute(query)
-        data = await cur.fetchall()
-        self.cache["premium_users"] = {r[0] for r in data} or set()
-
-        """Loading up users that have tips enabled"""
-        query = 'SELECT user_id FROM users_data WHERE tips = "TRUE"'
-        cur = await self.db.execute(query)
-        data = await cur.fetchall()
-        self.cache["tips_are_on"] = {r[0] for r in data} or set()
-
-        """Loading up users that have mentions enabled"""
-        query = 'SELECT user_id FROM users_data WHERE mentions = "TRUE"'
-        cur = await self.db.execute(query)
-        data = await cur.fetchall()
-        self.cache["mentions_are_on"] = {r[0] for r in data} or set()
-
-        """Loads up all disabled_commands"""
-        query = "SELECT command_name, snowflake_id FROM disabled_commands ORDER BY command_name"
-        cur = await self.db.execute(query)
-        data = await cur.fetchall()
-        self.cache["disabled_commands"] = {
-            cmd: [r[1] for r in _group]
-            for cmd, _group in itertools.groupby(data, key=operator.itemgetter(0))
-        }
+        """Loads blacklisted, premium, tips, mentions, disabled commands and prefixes in a single query"""
+        timings = {}
+        started = stage = time.perf_counter()
+
+        await self.migrate_disabled_commands()
+        timings["migrate"], stage = time.perf_counter() - stage, time.perf_counter()
+
+        query = """
+                SELECT 'blacklisted', guild_id, NULL FROM guild_config WHERE blacklisted = 1
+                UNION ALL SELECT 'blacklisted', user_id, NULL FROM users_data WHERE blacklisted = 1
+                UNION ALL SELECT 'premium', guild_id, NULL FROM guild_config WHERE premium = 1
+                UNION ALL SELECT 'premium', user_id, NULL FROM users_data WHERE premium = 1
+                UNION ALL SELECT 'tips', user_id, NULL FROM users_data WHERE tips = 1
+                UNION ALL SELECT 'mentions', user_id, NULL FROM users_data WHERE mentions = 1
+                UNION ALL SELECT 'disabled', snowflake_id, command_name FROM disabled_commands
+                UNION ALL SELECT 'prefix', guild_id, prefix FROM guild_config WHERE prefix IS NOT NULL AND prefix != ?
+                """
+        rows = await self.reads.fetchall(query, (self.prefixes.DEFAULT,))
+        timings["query"], stage = time.perf_counter() - stage, time.perf_counter()
+
+        flags = {"blacklisted": [], "premium": [], "tips": [], "mentions": []}
+        disabled = []
+        prefixes = []
+        for kind, snowflake_id, value in rows:
+            if kind == "disabled":
+                disabled.append((snowflake_id, value))
+            elif kind == "prefix":
+                prefixes.append((snowflake_id, value))
+            else:
+                flags[kind].append(snowflake_id)
+
+        self.cache["blacklisted_users"] = frozenset(flags["blacklisted"])
+        self.cache["premium_users"] = frozenset(flags["premium"])
+        self.cache["tips_are_on"] = frozenset(flags["tips"])
+        self.cache["mentions_are_on"] = frozenset(flags["mentions"])
+        self.cache["disabled_commands"] = DisabledCommands(disabled)
+        self.prefixes.fill(prefixes)
+        timings["build"] = time.perf_counter() - stage
+
+        self.cache.namespace("users", maxsize=10000, ttl=3600, policy="lfu")
+        self.cache.namespace("afk_users", maxsize=10000, ttl=86400 * 7)
+
+        self.logger.info(
+            f"Filled the cache from {len(rows)} rows in {(time.perf_counter() - started) * 1000:.1f}ms ("
+            + ", ".join(f"{name}: {seconds * 1000:.1f}ms" for name, seconds in timings.items()) + ")"
+        )
 
+    async def migrate_disabled_commands(self):
+        """
+        Rewrites disabled_commands rows saved with a bare command name (before they were keyed by qualified name).
+        A bare name used to match every command with that name, so a row is copied to each of them.
+        This needs the loaded commands, which is why it isn't a SQL migration; rows already rewritten are left alone.
+        """
+        qualified_names = {command.qualified_name for command in self.walk_commands()}
+        rows = await self.reads.fetchall("SELECT DISTINCT command_name FROM disabled_commands")
+
+        for command_name, in rows:
+            if command_name in qualified_names:
+                continue
+            targets = sorted({command.qualified_name for command in self.walk_commands() if command.name == command_name})
+            if not targets:
+                continue
+
+            self.writes.enqueue_many(
+                "INSERT OR IGNORE INTO disabled_commands SELECT snowflake_id, ? FROM disabled_commands WHERE command_name = ?",
+                ((target, command_name) for target in targets)
+            )
+            self.writes.enqueue("DELETE FROM disabled_commands WHERE command_name = ?", (command_name,))
+            self.logger.info(f"Disabled command {command_name!r} rewritten as {', '.join(targets)}")
 
-        self.cache["users"] = {}
-        self.cache['afk_users'] = {}
+        await self.writes.flush()
+
+    @to_call.append
+    def start_writer(self):
+        """Starts flushing (and committing) the queued database writes"""
+        self.writes.max_batch = self.config.getint('Database', 'batch_size', fallback=256)
+        self.writes.interval = self.config.getfloat('Database', 'flush_interval', fallback=2)
+        self.writes.start()
+
+    @to_call.append
+    async def start_bus(self):
+        """Starts listening for cache invalidations published by other processes"""
+        self.bus.interval = self.config.getfloat('Other', 'bus_interval', fallback=5)
+        await self.bus.start()
+        self.shutdown_hooks.append(self.bus.close)
+
+    async def refresh_flag(self, name, snowflake_id):
+        """Re-reads whether a single user or guild has a flag set"""
+        column, tables = self.FLAG_CACHES[name]
+        query = " UNION ALL ".join(
+            f"SELECT 1 FROM {table} WHERE {'guild_id' if table == 'guild_config' else 'user_id'} = ? AND {column} = 1"
+            for table in tables
+        )
+        cur = await self.db.execute(query, (snowflake_id,) * len(tables))
+        if await cur.fetchone() is None:
+            self.cache[name] -= {snowflake_id}
+        else:
+            self.cache[name] |= {snowflake_id}
+
+    async def refresh_disabled(self, command_name):
+        """Re-reads where a single command is disabled"""
+        cur = await self.db.execute(queries.DISABLED_COMMAND, (command_name,))
+        self.cache["disabled_commands"].replace(command_name, (r[0] for r in await cur.fetchall()))
 
     # Other functions
     async def get_prefix(self, message):
@@ -190,20 +325,9 @@ class GrootBot(commands.Bot):
         the appropriate prefixes depending on the guild."""
         if message.author == getattr(self, 'owner', None):
             return ["", "g."]
-        query = "SELECT prefix FROM guild_config WHERE guild_id=?"
-        snowflake_id = getattr(message.guild, "id", message.author.id)
-        self.cache.setdefault("prefix", {})
-        if not (prefix := self.cache["prefix"].get(snowflake_id)):
-            cur = await self.db.execute(query, (snowflake_id,))
-            data = await cur.fetchone()
-            data = data if data else ["g."]
-            prefix = self.cache["prefix"].setdefault(snowflake_id, data[0])
-
-        comp = re.compile(f"^({re.escape(prefix)}).*", flags=re.I)
-        match = comp.match(message.content)
-        if match is not None:
-            return match.group(1)
-        return prefix
+
+        prefix = await self.prefixes.get(getattr(message.guild, "id", message.author.id))
+        return self.prefixes.match(prefix, message.content) or prefix
 
     def get_message(self, message_id):
         """Gets the message from the cache"""
@@ -214,12 +338,27 @@ class GrootBot(commands.Bot):
         context = await super().get_context(message, cls=customContext)
         return context
 
+    async def should_dispatch(self, message):
+        """Cheap checks that reject a message before a context is built for it"""
+        if message.author.id == 396805720353275924:
+            return True
+
+        if (message.author.id in self.cache["blacklisted_users"] or getattr(message.guild, "id", None) in self.cache["blacklisted_users"]):
+            return False
+
+        prefix = await self.prefixes.get(getattr(message.guild, "id", message.author.id))
+        return self.prefixes.match(prefix, message.content) is not None
+
     async def process_commands(self, message):
         """Override process_commands to check, and call typing every invoke"""
         if message.author.bot:
             return
 
-        # Checks etc for blacklist ...
+        if not await self.should_dispatch(message):
+            self.message_stats["rejected"] += 1
+            return
+        self.message_stats["dispatched"] += 1
+
         ctx = await self.get_context(message)
         if message.author.id == 396805720353275924:
             await self.invoke(ctx)
@@ -229,18 +368,9 @@ class GrootBot(commands.Bot):
             await message.channel.send("Bot is in maintenance. Please try again later.")
             return
 
-        if (message.author.id in self.cache["blacklisted_users"] or getattr(message.guild, "id", None) in self.cache["blacklisted_users"]):
+        if ctx.valid and self.cache["disabled_commands"].is_disabled(ctx.command, message.channel.id, getattr(message.guild, "id", None)):
             return
 
-        if ctx.valid and ctx.command.name in self.cache["disabled_commands"].keys():
-            if (
-                ctx.valid
-                and message.channel.id in self.cache["disabled_commands"][ctx.command.name]
-                or ctx.valid
-                and message.guild.id in self.cache["disabled_commands"][ctx.command.name]
-            ):
-                return
-
         # Trigger typing every invoke
         if ctx.valid and getattr(ctx.cog, "qualified_name", None) != "Jishaku":
             await ctx.trigger_typing()
@@ -248,10 +378,12 @@ class GrootBot(commands.Bot):
 
     def starter(self):
         """Starts the bot properly"""
+        path = f"{self.cwd}/data/main.sqlite3"
         try:
-            db = self.loop.run_until_complete(
-                aiosqlite.connect(f"{self.cwd}/data/main.sqlite3")
-            )
+            db = self.loop.run_until_complete(connect_writer(path))
+            self.loop.run_until_complete(self.writes.open(path))
+            self.reads = ReadPool(path, size=self.config.getint('Database', 'read_connections', fallback=4))
+            self.loop.run_until_complete(self.reads.open())
         except Exception as e:
             print_exception("Could not connect to database:", e)
 
@@ -23,15 +23,11 @@ class Configuration(commands.Shard):
         if modus != "on" and modus != "off":
             raise discord.ext.commands.MissingRequiredArgument(ctx.command)
 
-        modus = "TRUE" if modus == "on" else "FALSE"
+        modus = 1 if modus == "on" else 0
 
-        if modus == "TRUE":
-            self.bot.cache["tips_are_on"].add(ctx.author.id)
-        else:
-            self.bot.cache["tips_are_on"].discard(ctx.author.id)
-
-        query = "UPDATE users_data SET tips = ? WHERE user_id = ?"
-        await self.bot.db.execute(query, (modus, ctx.author.id))
+        query = "INSERT INTO users_data (user_id, tips) VALUES (?, ?) ON CONFLICT(user_id) DO UPDATE SET tips = excluded.tips"
+        await self.bot.db.execute(query, (ctx.author.id, modus))
+        await self.bot.bus.publish("tips_are_on", ctx.author.id)
         return await ctx.send(
             f"{self.bot.icons['greenTick']} Toggled your tips to `{mode.upper()}`"
         )
@@ -48,14 +44,11 @@ class Configuration(commands.Shard):
             await ctx.send_help(ctx.command)
             return
 
-        modus = "TRUE" if modus == "on" else "FALSE"
-        if modus == "TRUE":
-            self.bot.cache["mentions_are_on"].add(ctx.author.id)
-        else:
-            self.bot.cache["mentions_are_on"].discard(ctx.author.id)
+        modus = 1 if modus == "on" else 0
 
-        query = "UPDATE users_data SET mentions = ? WHERE user_id = ?"
-        await self.bot.db.execute(query, (modus, ctx.author.id))
+        query = "INSERT INTO users_data (user_id, mentions) VALUES (?, ?) ON CONFLICT(user_id) DO UPDATE SET mentions = excluded.mentions"
+        await self.bot.db.execute(query, (ctx.author.id, modus))
+        await self.bot.bus.publish("mentions_are_on", ctx.author.id)
         return await ctx.send(
             f"{self.bot.icons['greenTick']} Toggled your mentions to `{mode.upper()}`"
         )
@@ -102,7 +95,7 @@ class Configuration(commands.Shard):
         """
         query = "INSERT INTO guild_config (guild_id, prefix) VALUES (?, ?) ON CONFLICT (guild_id) DO UPDATE SET prefix = ?"
         await self.bot.db.execute(query, (ctx.guild.id, prefix, prefix))
-        self.bot.cache["prefix"][ctx.guild.id] = prefix
+        await self.bot.bus.publish("prefixes", ctx.guild.id)
         await ctx.send(
             f"The prefix has been set to `{prefix}`. To change the prefix again, use `{prefix}config prefix <prefix>`"
         )
@@ -121,29 +114,26 @@ class Configuration(commands.Shard):
         """
 
         try:
-            command = str(self.bot.get_command(command).name)
+            command = self.bot.get_command(command).qualified_name
         except Exception:
             raise commands.BadArgument("That is not a valid command.")
         if snowflake_id is None:
             snowflake_id = ctx.guild
-        query = "INSERT INTO disabled_commands VALUES (?, ?)"
+        # The row can exist without being cached yet (another process, a pending invalidation)
+        query = "INSERT OR IGNORE INTO disabled_commands VALUES (?, ?)"
         txt = (
             f" for {snowflake_id.mention}"
             if isinstance(snowflake_id, discord.TextChannel)
             else " for this server"
         )
-        try:
-            await self.bot.db.execute(query, (snowflake_id.id, command))
-        except Exception:
+        if (command, snowflake_id.id) in self.bot.cache["disabled_commands"]:
             raise commands.BadArgument(
                 f"{self.bot.icons['redTick']} That command is already disabled{txt}!"
             )
-        else:
-            try:
-                self.bot.cache["disabled_commands"][command].append(snowflake_id.id)
-            except KeyError:
-                self.bot.cache["disabled_commands"][command] = [ctx.guild.id]
-            await ctx.send(f"{self.bot.icons['greenTick']} Disabled command `{command}`{txt}")
+
+        await self.bot.db.execute(query, (snowflake_id.id, command))
+        await self.bot.bus.publish("disabled_commands", command)
+        await ctx.send(f"{self.bot.icons['greenTick']} Disabled command `{command}`{txt}")
 
     @commands.command(
         name="enable",
@@ -158,7 +148,7 @@ class Configuration(commands.Shard):
         If no channel is given, it enables the disabled for the whole guild.
         """
         try:
-            command = self.bot.get_command(command).name
+            command = self.bot.get_command(command).qualified_name
         except Exception:
             raise commands.BadArgument("That is not a valid command.")
         if snowflake_id is None:
@@ -169,20 +159,14 @@ class Configuration(commands.Shard):
             if isinstance(snowflake_id, discord.TextChannel)
             else " for this server"
         )
-        cur = await self.bot.db.execute(
-            "SELECT command_name FROM disabled_commands WHERE snowflake_id = ? AND command_name = ?",
-            (snowflake_id.id, command),
-        )
-        row = await cur.fetchone()
-
-        if row is None:
+        if (command, snowflake_id.id) not in self.bot.cache["disabled_commands"]:
             raise commands.BadArgument(
                 f"{self.bot.icons['redTick']} That command is not disabled{txt}!"
             )
         else:
             query = "DELETE FROM disabled_commands WHERE snowflake_id = ? AND command_name = ?"
-            self.bot.cache["disabled_commands"][command].remove(snowflake_id.id)
             await self.bot.db.execute(query, (snowflake_id.id, command))
+            await self.bot.bus.publish("disabled_commands", command)
             await ctx.send(f"{self.bot.icons['greenTick']} Enabled command `{command}`{txt}")
 
     @commands.command(name="resetmydata")
@@ -3,36 +3,125 @@ from utils._type import *
 import asyncio
 import async_timeout
 import discord
+import json
 import re
+import time
 import wavelink
 import math
-import random
 
-from discord.ext import commands, menus
-from utils.useful import Cooldown, Embed, get_title
+from discord.ext import commands, menus, tasks
+from utils.useful import Cooldown, Embed, get_title, convert
+from utils.queue import TrackQueue
+from utils.tracks import TrackCache, SourceHealth
+from utils.nodes import NodePool
+from utils.voice import VoiceIndex
 from utils import paginations
 
 
 URL_REG = re.compile(r'https?://(?:www\.)?.+')
 
-def convert(ms):
-    seconds, milliseconds = divmod(ms, 1000)
-    minutes, seconds = divmod(seconds, 60)
-    hours, minutes = divmod(minutes, 60)
-
-    result = [hours, minutes, seconds]
-    format_result = [f"0{i}" if len(str(i)) == 1 else str(i) for i in result]
-    return ":".join(format_result).removeprefix("00:").removesuffix(":")
-
 class Track(wavelink.Track):
     """Wavelink Track object with a requester attribute."""
 
-    __slots__ = ('requester', )
+    __slots__ = ('requester', 'fallback')
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args)
 
         self.requester = kwargs.get('requester')
+        self.fallback = None
+        if thumbnail := self.info.get('thumbnail'):
+            self.thumb = thumbnail
+
+class NowPlaying:
+    """
+    Keeps a single now-playing message per player up to date.
+    Bursts of state changes are coalesced into at most one edit every `delay` seconds,
+    and the parts of the embed that only depend on the track are built once per track.
+    """
+
+    def __init__(self, player, *, delay: float = 5):
+        self.player = player
+        self.delay = delay
+        self.message = None
+
+        self._task = None
+        self._last_edit = 0
+        self._static = (None, None)
+
+    def _static_embed(self, track) -> dict:
+        if self._static[0] != track.id:
+            em = Embed(
+                title = get_title(track),
+                url = track.uri
+            )
+            em.add_field(name="Author", value=track.author, inline=True)
+            em.add_field(name="Duration", value=convert(int(track.length)), inline=True)
+            em.set_thumbnail(url=track.thumb)
+            self._static = (track.id, em.to_dict())
+        return self._static[1]
+
+    def build(self):
+        player = self.player
+        track = player.current
+        icons = player.bot.icons
+
+        em = Embed.from_dict(self._static_embed(track))
+        fields = {
+            "Looping": icons['greenTick'] if player.looping else icons['redTick'],
+            "Requested by": track.requester.mention,
+            # A restored player has no DJ when nobody was left in the channel
+            "DJ": player.dj.mention if player.dj else "Nobody",
+            "Volume": f"{player.volume}%"
+        }
+        for name, value in fields.items():
+            em.add_field(name=name, value=value, inline=True)
+
+        em.set_footer(text=f"Queue index: 1/{len(player.queue)+1}", icon_url=track.requester.avatar.url)
+        return em
+
+    def update(self):
+        """Schedules an edit of the now-playing message, merging it with any pending one."""
+        if self._task is not None and not self._task.done():
+            return
+
+        wait = max(0, self._last_edit + self.delay - time.monotonic())
+        self._task = self.player.bot.loop.create_task(self._flush(wait))
+
+    async def _flush(self, wait: float):
+        await asyncio.sleep(wait)
+        self._last_edit = time.monotonic()
+        # Nothing awaits this task, an error would otherwise only surface as "never retrieved"
+        try:
+            await self.send()
+        except discord.HTTPException as e:
+            self.player.bot.logger.warning(f"Could not update the now-playing message of guild {self.player.guild_id}: {e}")
+        except Exception as e:
+            self.player.bot.logger.error(f"Now-playing update of guild {self.player.guild_id} failed: {e!r}")
+
+    async def send(self, *, new=False):
+        """Edits the now-playing message right away, or sends a new one if there is none (or `new` is set)."""
+        track = self.player.current
+        if not track:
+            return
+
+        content = f"Now playing: **{track.title}**"
+        embed = self.build()
+        if self.message is not None and not new:
+            try:
+                await self.message.edit(content=content, embed=embed)
+                return
+            except discord.HTTPException:
+                pass
+        if self.player.ctx is not None:
+            self.message = await self.player.ctx.reply(content=content, embed=embed)
+        else:
+            self.message = await self.player.text_channel.send(content=content, embed=embed)
+
+    def cancel(self):
+        if self._task is not None:
+            self._task.cancel()
+
 
 class Player(wavelink.Player):
 
@@ -40,23 +129,23 @@ class Player(wavelink.Player):
         super().__init__(*args, **kwargs)
 
         self.ctx = kwargs.get('context', None)
-        if self.ctx:
-            self.dj = self.ctx.author
+        self.text_channel = kwargs.get('channel') or getattr(self.ctx, 'channel', None)
+        self.dj = getattr(self.ctx, 'author', None)
 
         self.waiting = False
-        self.updating = False
         self.looping = False
         self.loading = False
+        self.now_playing = NowPlaying(self)
 
         self.previous = None
-        self.queue = asyncio.Queue()
+        self.queue = TrackQueue()
 
         self.skip_votes = set()
         self.stop_votes = set()
         self.shuffle_votes = set()
 
     async def play_next(self):
-        if self.is_playing or self.waiting or self.loading:
+        if self.is_playing or self.waiting:
             return
 
         self.skip_votes.clear()
@@ -69,55 +158,62 @@ class Player(wavelink.Player):
             self.waiting = False
             return
 
+        self.waiting = True
         try:
-            self.waiting = True
-            with async_timeout.timeout(300):
-                track = await self.queue.get()
-        except asyncio.TimeoutError:
-            self.waiting = False
-            return await self.teardown()
+            track = self.queue.get_nowait()
+        except asyncio.QueueEmpty:
+            try:
+                with async_timeout.timeout(300):
+                    track = await self.queue.get()
+            except asyncio.TimeoutError:
+                self.waiting = False
+                return await self.teardown()
+
+        if track.fallback is not None and self.bot.source_health.is_open(SourceHealth.source_of(track.uri)):
+            track = track.fallback
 
         await self.play(track)
-        await self.send_embed()
 
         self.previous = track
         self.waiting = False
         self.looping = False
 
-    async def stop(self):
-        """Custom stop method"""
-        self.looping = False
-        await super().stop()
+        # Everything below is off the critical path between two tracks
+        self.now_playing.update()
+        self.bot.loop.create_task(self.prepare_next())
 
-    async def send_embed(self):
-        if self.updating: return
+    async def prepare_next(self):
+        """
+        Gets the head of the queue ready while the current track is still playing,
+        resolving its fallback up front if the track's source is not healthy.
+        """
+        try:
+            track = self.queue[0]
+        except IndexError:
+            return
 
-        self.updating = True
-        track = self.current
-        if not track: return
+        health = self.bot.source_health
+        source = health.source_of(track.uri)
+        if track.fallback is not None or health.is_healthy(source) or not (query := health.fallback_search(source, track.title)):
+            return
 
-        em = Embed(
-            title = get_title(track),
-            url = track.uri
-        )
+        # Nothing awaits this task, the track just plays from its own source if this fails
+        try:
+            tracks = await self.bot.track_cache.get_tracks(query)
+        except Exception as e:
+            return self.bot.logger.warning(f"Could not resolve a fallback for the next track of guild {self.guild_id}: {e!r}")
 
-        fields = {
-            "Author": (track.author, True),
-            "Duration": (convert(int(track.length)), True),
-            "Looping": (f"{self.ctx.bot.icons['greenTick'] if self.looping else self.ctx.bot.icons['redTick']}", True),
-            "Requested by": (track.requester.mention, True),
-            "DJ": (self.dj.mention, True),
-            "Volume": (f"{self.volume}%", True)
-        }
-        for k, v in fields.items():
-            em.add_field(name=k, value=v[0], inline=True)
+        if tracks and not isinstance(tracks, wavelink.TrackPlaylist):
+            track.fallback = Track(tracks[0].id, tracks[0].info, requester=track.requester)
 
-        em.set_thumbnail(url=track.thumb)
-        em.set_footer(text=f"Queue index: 1/{self.queue.qsize()+1}", icon_url=track.requester.avatar.url)
-        await self.ctx.reply(content=f"Now playing: **{track.title}**", embed=em)
-        self.updating = False
+    async def stop(self):
+        """Custom stop method"""
+        self.looping = False
+        await super().stop()
 
     async def teardown(self):
+        self.now_playing.cancel()
+        self.bot.writes.enqueue("DELETE FROM player_snapshots WHERE guild_id = ?", (self.guild_id,))
         try:
             await self.destroy()
         except KeyError:
@@ -125,6 +221,24 @@ class Player(wavelink.Player):
 
     def update_context(self, ctx: customContext):
         self.ctx = ctx
+        self.text_channel = ctx.channel
+
+    def snapshot(self) -> dict:
+        """Everything needed to bring this player back after a restart."""
+        def dump(track):
+            return [track.id, track.info, getattr(track.requester, 'id', None)]
+
+        return {
+            'channel': int(self.channel_id),
+            'text_channel': self.text_channel.id,
+            'dj': getattr(self.dj, 'id', None),
+            'volume': self.volume,
+            'eq': getattr(self.equalizer, 'name', 'flat').lower(),
+            'looping': self.looping,
+            'position': int(self.position),
+            'current': dump(self.current) if self.current else None,
+            'queue': [dump(track) for track in self.queue]
+        }
 
 class Music(commands.Shard, wavelink.WavelinkMixin):
     def __init__(self, cog: commands.Cog):
@@ -134,48 +248,163 @@ class Music(commands.Shard, wavelink.WavelinkMixin):
         if not hasattr(self.bot, 'wavelink'):
             self.bot.wavelink = wavelink.Client(bot=self.bot)
 
+        if not hasattr(self.bot, 'track_cache'):
+            self.bot.track_cache = TrackCache(self.bot, maxsize=self.bot.config.getint('Other', 'track_cache_size', fallback=2048))
+
+        if not hasattr(self.bot, 'voice_index'):
+            self.bot.voice_index = VoiceIndex()
+
+        if not hasattr(self.bot, 'source_health'):
+            self.bot.source_health = SourceHealth()
+
+        if not hasattr(self.bot, 'node_pool'):
+            self.bot.node_pool = NodePool(self.bot)
+
+        self.restored = False
         self.bot.loop.create_task(self.start_nodes())
+        self.bot.shutdown_hooks.append(self.save_players)
+
+    def shard_unload(self):
+        self.save_loop.cancel()
+        self.bot.shutdown_hooks.remove(self.save_players)
+        # Players that don't survive the reload (their node was dropped) are recreated from this snapshot
+        self.bot.pending_snapshot = self.bot.loop.create_task(self.save_players())
 
     async def start_nodes(self):
         await self.bot.wait_until_ready()
+        if (pending := getattr(self.bot, 'pending_snapshot', None)) is not None:
+            await pending
+        await self.bot.node_pool.connect()
+        try:
+            await self.restore_players()
+        finally:
+            # Saving any earlier would replace the snapshots with the (still empty) players
+            self.restored = True
+            self.save_loop.start()
+
+    @tasks.loop(minutes=1)
+    async def save_loop(self):
+        await self.save_players()
+
+    @save_loop.before_loop
+    async def before_save_loop(self):
+        await self.bot.wait_until_ready()
 
-        if self.bot.wavelink.nodes:
-            previous = self.bot.wavelink.nodes.copy()
+    async def save_players(self):
+        """Stores a snapshot of every active player, replacing the previous ones."""
+        if not self.restored:
+            return
 
-            for node in previous.values():
-                await node.destroy()
+        rows = []
+        now = int(time.time())
+        for node in self.bot.wavelink.nodes.values():
+            for guild_id, player in node.players.items():
+                if not player.is_connected or player.text_channel is None or not (player.current or player.queue):
+                    continue
+                rows.append((guild_id, json.dumps(player.snapshot(), separators=(',', ':')), now))
+
+        # Both go out in the same transaction, so there is never a moment without snapshots
+        self.bot.writes.enqueue("DELETE FROM player_snapshots")
+        self.bot.writes.enqueue_many("INSERT INTO player_snapshots (guild_id, data, saved_at) VALUES (?, ?, ?)", rows)
+        await self.bot.writes.flush()
+
+    async def restore_players(self):
+        """Recreates the players of snapshots that are recent enough, then drops every snapshot."""
+        max_age = self.bot.config.getint('Other', 'snapshot_max_age', fallback=600)
+        rows = await self.bot.reads.fetchall(
+            "SELECT guild_id, data FROM player_snapshots WHERE saved_at > ?", (int(time.time()) - max_age,)
+        )
+        for guild_id, data in rows:
+            try:
+                await self.restore_player(guild_id, json.loads(data))
+            except Exception as e:
+                self.bot.logger.warning(f"Could not restore the player of guild {guild_id}: {e}")
 
-        created = False
-        node_num = 1
+        self.bot.writes.enqueue("DELETE FROM player_snapshots")
+        await self.bot.writes.flush()
 
-        while not created:
-            try:
-                await self.bot.wavelink.initiate_node(
-                    host='127.0.0.1',
-                    port=2333,
-                    rest_uri='http://127.0.0.1:2333',
-                    password=self.bot.config.get('Other', 'password'),
-                    identifier=f"Node {node_num}",
-                    region=f"us_central"
-                )
-            except wavelink.errors.NodeOccupied:
-                node_num += 1
-                created = True
+    async def restore_player(self, guild_id: int, data: dict):
+        guild = self.bot.get_guild(guild_id)
+        # A live player (the shard was only reloaded) is already in the state the snapshot describes
+        if guild is None or self.find_player(guild_id) is not None:
+            return
+
+        channel = guild.get_channel(data['channel'])
+        text_channel = guild.get_channel(data['text_channel'])
+        if channel is None or text_channel is None or not any(not m.bot for m in channel.members):
+            return
+
+        def load(dumped):
+            _id, info, requester = dumped
+            return Track(_id, info, requester=guild.get_member(requester) or guild.me)
+
+        node = self.bot.node_pool.best_node()
+        player = self.bot.wavelink.get_player(guild_id, cls=Player, node_id=getattr(node, 'identifier', None), channel=text_channel)
+        player.dj = guild.get_member(data['dj']) or next((m for m in channel.members if not m.bot), None)
+        player.looping = data['looping']
+        player.queue.extend(load(track) for track in data['queue'])
+
+        await player.connect(channel.id)
+        await player.set_volume(data['volume'])
+        if (eq := getattr(wavelink.Equalizer, data['eq'], None)) is not None:
+            await player.set_eq(eq())
+
+        if data['current']:
+            track = load(data['current'])
+            player.waiting = True
+            await player.play(track, start=data['position'])
+            player.previous = track
+            player.waiting = False
+            player.now_playing.update()
+        else:
+            await player.play_next()
+
+    def listeners(self, player: Player) -> int:
+        """Amount of non-bot members listening to the player, from the voice index."""
+        if player.guild_id not in self.bot.voice_index:
+            self.bot.voice_index.track(self.bot.get_channel(int(player.channel_id)))
+        return self.bot.voice_index.listeners(player.guild_id)
 
     def required(self, ctx: customContext):
         """Method which returns required votes based on amount of members in a channel."""
         player = self.get_player(ctx)
-        channel = self.bot.get_channel(int(player.channel_id))
-        required = math.ceil((len(channel.members) - 1) / 2.5)
+        listeners = self.listeners(player)
+        required = math.ceil(listeners / 2.5)
 
         if ctx.command.name == 'stop':
-            if len(channel.members) == 3:
+            if listeners == 2:
                 required = 2
 
         return required
 
+    def find_player(self, guild_id: int) -> Optional[Player]:
+        """Gets a guild's player without creating one."""
+        for node in self.bot.wavelink.nodes.values():
+            if (player := node.players.get(guild_id)) is not None:
+                return player
+        return None
+
+    async def resolve(self, query: str):
+        """Resolves a query, going straight to the fallback source while the query's source is throttled."""
+        health = self.bot.source_health
+        source = health.source_of(query)
+
+        if health.is_open(source):
+            if URL_REG.match(query):
+                payload = await self.bot.track_cache.lookup(query)
+                title = payload['tracks'][0]['info']['title'] if payload and payload.get('tracks') else None
+            else:
+                title = query.partition(':')[2]
+
+            if title and (fallback := health.fallback_search(source, title)):
+                if tracks := await self.bot.track_cache.get_tracks(fallback):
+                    return tracks
+
+        return await self.bot.track_cache.get_tracks(query)
+
     def get_player(self, ctx: customContext):
-        player = self.bot.wavelink.get_player(guild_id=ctx.guild.id, cls=Player, context=ctx)
+        node = self.bot.node_pool.best_node()
+        player = self.bot.wavelink.get_player(guild_id=ctx.guild.id, cls=Player, node_id=getattr(node, 'identifier', None), context=ctx)
         player.update_context(ctx)
         return player
 
@@ -185,54 +414,66 @@ class Music(commands.Shard, wavelink.WavelinkMixin):
 
     @wavelink.WavelinkMixin.listener('on_track_stuck')
     @wavelink.WavelinkMixin.listener('on_track_end')
-    @wavelink.WavelinkMixin.listener('on_track_exception')
     async def on_player_stop(self, node: wavelink.Node, payload):
         await payload.player.play_next()
 
+    @wavelink.WavelinkMixin.listener('on_track_start')
+    async def on_track_start(self, node: wavelink.Node, payload):
+        self.bot.source_health.success(SourceHealth.source_of(payload.track.uri))
+
     @wavelink.WavelinkMixin.listener("on_track_exception") #ty to cryptex for helping because jadon is stupid omegalul
     async def on_node_event_(self, node, event):
         if "YouTube (429)" in event.error:
             player = event.player
-            if URL_REG.fullmatch(player.query):
-                new_track = await self.bot.wavelink.get_tracks(f"scsearch:{player.track.title}")
-            else:
-                new_track = await self.bot.wavelink.get_tracks(f"scsearch:{player.query}")
-            if new_track:
+            failed = event.track
+            self.bot.source_health.failure('youtube')
+
+            # The track end event that follows plays the head of the queue, so the fallback goes there
+            track = getattr(failed, 'fallback', None)
+            if track is None:
+                new_track = await self.bot.track_cache.get_tracks(f"scsearch:{failed.title}")
+                if not new_track:
+                    await player.text_channel.send(f"{self.bot.icons['redTick']} | No song was found with the given query. Try again.")
+                    return
                 track = Track(
                     new_track[0].id,
                     new_track[0].info,
-                    requester=player.ctx.author,
+                    requester=getattr(failed, 'requester', None) or player.dj,
                 )
-                await player.play(track)
-                await player.send_embed()
-            else:
-                raise commands.BadArgument(f"{self.bot.icons['redTick']} | No song was found with the given query. Try again.")
+            player.queue.insert(0, track)
         else:
-            await event.player.ctx.send(event.error)
+            await event.player.text_channel.send(event.error)
 
     @commands.Cog.listener()
     async def on_voice_state_update(self, member: discord.Member, before: discord.VoiceState, after: discord.VoiceState):
-        if member.bot:
-            return
+        index = self.bot.voice_index
+        guild_id = member.guild.id
 
-        player = self.bot.wavelink.get_player(member.guild.id, cls=Player)
+        if member.id == self.bot.user.id:
+            if after.channel is None:
+                index.forget(guild_id)
+            else:
+                index.track(after.channel)
+            return
 
-        if not player.channel_id or not player.ctx:
-            player.node.players.pop(member.guild.id)
+        # Guilds without a connected player are not indexed, so nothing to do for them
+        if member.bot or guild_id not in index:
             return
 
-        channel = self.bot.get_channel(int(player.channel_id))
+        index.update(member, before, after)
 
-        if member == player.dj and after.channel is None:
-            for m in channel.members:
-                if m.bot:
-                    continue
-                else:
-                    player.dj = m
-                    return
+        player = self.find_player(guild_id)
+        if player is None or player.dj is None:
+            return
+
+        if member == player.dj and not index.is_listening(guild_id, member.id):
+            if (candidate := next(index.candidates(guild_id), None)) is not None:
+                player.dj = member.guild.get_member(candidate)
+                player.now_playing.update()
 
-        elif after.channel == channel and player.dj not in channel.members:
+        elif index.is_listening(guild_id, member.id) and not index.is_listening(guild_id, player.dj.id):
             player.dj = member
+            player.now_playing.update()
 
     @commands.command(name='connect', usage="[channel]")
     async def _connect(self, ctx: customContext, channel: discord.VoiceChannel = None, invoked_from=None):
@@ -275,7 +516,7 @@ class Music(commands.Shard, wavelink.WavelinkMixin):
         if not URL_REG.match(query):
             query = f'ytsearch:{query}'
 
-        tracks = await self.bot.wavelink.get_tracks(query)
+        tracks = await self.resolve(query)
         if not tracks:
             raise commands.BadArgument(f"{self.bot.icons['redTick']} | No song was found with the given query. Try again.")
 
@@ -306,6 +547,7 @@ class Music(commands.Shard, wavelink.WavelinkMixin):
             player.looping = True
             message = f"Looping **{player.current.title}**..."
 
+        player.now_playing.update()
         return await ctx.reply(f"{self.bot.icons['greenTick']} | {message}")
 
     @commands.command(name="skip", aliases=["next"])
@@ -362,13 +604,11 @@ class Music(commands.Shard, wavelink.WavelinkMixin):
         if not player.is_connected or player.loading:
             return
 
-        if player.queue.qsize() == 0:
+        if not player.queue:
             await ctx.reply(f"{self.bot.icons['redTick']} | No more songs in the queue. Add some songs to the queue and try again.")
             return
 
-
-        entries = [f"**{i+1}**. [{track.title}]({track.uri}) | `{convert(int(track.length))}`" for i, track in enumerate(player.queue._queue, start=1)]
-        menu = menus.MenuPages(paginations.QueueSource(entries, player))
+        menu = menus.MenuPages(paginations.QueueSource(player))
         await menu.start(ctx)
 
     @queue.command(name="remove")
@@ -379,15 +619,33 @@ class Music(commands.Shard, wavelink.WavelinkMixin):
         if not player.is_connected:
             return
 
-        size = player.queue.qsize() + 1
+        size = len(player.queue) + 1
 
-        if position > size or position == 1:
+        if not 1 < position <= size:
             raise commands.BadArgument(f"{self.bot.icons['redTick']} | The given song number to remove must be inside the queue (and not the current playing one).")
 
-        track = player.queue._queue[position-2]
-        del player.queue._queue[position-2]
+        track = player.queue.pop(position-2)
         await ctx.reply(f"{self.bot.icons['minus']} | Removed **{position}. {track.title}** from the queue.")
 
+    @queue.command(name="move", usage="<from> <to>")
+    async def _move(self, ctx: customContext, position: int, destination: int):
+        """Moves a song in the queue to another position."""
+        player = self.get_player(ctx)
+
+        if not player.is_connected:
+            return
+
+        if not self.is_privileged(ctx):
+            return await ctx.reply(f"{self.bot.icons['redTick']} | Only privileged members (DJ/requester) can move songs in the queue.")
+
+        size = len(player.queue) + 1
+
+        if not (1 < position <= size and 1 < destination <= size):
+            raise commands.BadArgument(f"{self.bot.icons['redTick']} | The given song numbers must be inside the queue (and not the current playing one).")
+
+        track = player.queue.move(position-2, destination-2)
+        await ctx.reply(f"{self.bot.icons['greenTick']} | Moved **{track.title}** to position **{destination}**.")
+
 
     @commands.command(name="volume")
     async def _volume(self, ctx: customContext, volume: int):
@@ -404,6 +662,7 @@ class Music(commands.Shard, wavelink.WavelinkMixin):
             return await ctx.reply(f"{self.bot.icons['redTick']} | The volume value must be in between 0 and 100")
 
         await player.set_volume(volume)
+        player.now_playing.update()
         await ctx.reply(f"{self.bot.icons['greenTick']} | Changed volume to {volume}%")
 
     @commands.command(name="shuffle")
@@ -414,11 +673,11 @@ class Music(commands.Shard, wavelink.WavelinkMixin):
         if not player.is_connected:
             raise commands.BadArgument(f"{self.bot.icons['redTick']} | No song is playing.")
 
-        if player.queue.qsize() < 3:
+        if len(player.queue) < 3:
             return await ctx.reply(f"{self.bot.icons['redTick']} | Add more songs to the queue first before shuffling.")
 
         if self.is_privileged(ctx):
-            random.shuffle(player.queue._queue)
+            player.queue.shuffle()
             return await ctx.reply(f"{self.bot.icons['greenTick']} | {ctx.author.mention} shuffled the playlist.")
 
         required = self.required(ctx)
@@ -426,7 +685,7 @@ class Music(commands.Shard, wavelink.WavelinkMixin):
 
         if (votes := len(player.skip_votes)) >= required:
             player.skip_votes.clear()
-            random.shuffle(player.queue._queue)
+            player.queue.shuffle()
             await ctx.reply(f"{self.bot.icons['greenTick']} | Shuffled playlist.")
         else:
             await ctx.reply(f'{ctx.author.mention} has voted to shuffle the playlist. (`{votes}/{required}`)')
@@ -439,7 +698,7 @@ class Music(commands.Shard, wavelink.WavelinkMixin):
         if not player.is_connected:
             raise commands.BadArgument(f"{self.bot.icons['redTick']} | No song is playing.")
 
-        await player.send_embed()
+        await player.now_playing.send(new=True)
 
     @commands.command(aliases=['eq'], usage="<flat|boost|metal|piano>")
     async def equalizer(self, ctx: customContext, *, equalizer: str):
@@ -468,6 +727,17 @@ class Music(commands.Shard, wavelink.WavelinkMixin):
         await ctx.reply(f"{self.bot.icons['greenTick']} | Successfully changed equalizer to {equalizer}")
         await player.set_eq(eq)
 
+    @commands.command(name="nodes")
+    @commands.is_owner()
+    async def _nodes(self, ctx: customContext):
+        """Shows the load of every Lavalink node."""
+        lines = [
+            f"{self.bot.icons['online'] if node['available'] else self.bot.icons['offline']} **{identifier}** | "
+            f"`{node['players']}` players | CPU `{node['cpu'] or 0:.0%}` | deficit `{node['deficit']}` | load `{node['load']:.1f}`"
+            for identifier, node in self.bot.node_pool.stats().items()
+        ]
+        await ctx.reply(embed=Embed(description="\n".join(lines) or "No nodes."))
+
     @commands.command(aliases=['dj', 'swap'])
     async def swap_dj(self, ctx: customContext, member: discord.Member = None):
         """Swap the current DJ to another member in the voice channel."""
@@ -479,28 +749,27 @@ class Music(commands.Shard, wavelink.WavelinkMixin):
         if not self.is_privileged(ctx):
             return await ctx.reply(f"{self.bot.icons['redTick']} | Only admins and the DJ may use this command.")
 
-        channel = self.bot.get_channel(int(player.channel_id))
-        members = channel.members
+        listeners = self.listeners(player)
+        candidates = self.bot.voice_index.candidates(ctx.guild.id, exclude=getattr(player.dj, 'id', None))
 
-        if member and member not in members:
-            return await ctx.reply(f"{self.bot.icons['redTick']} | **{member.name}** is not currently in {channel.mention}, so can not be a DJ.")
+        if member and not self.bot.voice_index.is_listening(ctx.guild.id, member.id):
+            return await ctx.reply(f"{self.bot.icons['redTick']} | **{member.name}** is not currently in <#{player.channel_id}>, so can not be a DJ.")
 
         if member and member == player.dj:
             return await ctx.reply(f"{self.bot.icons['redTick']} | Cannot swap DJ to the current DJ...")
 
-        if len(members) <= 2:
+        if listeners <= 1:
             return await ctx.reply(f"{self.bot.icons['redTick']} | No more members to swap to.")
 
         if member:
             player.dj = member
+            player.now_playing.update()
             return await ctx.send(f"{member.mention} is now the DJ.")
 
-        for m in members:
-            if m == player.dj or m.bot:
-                continue
-            else:
-                player.dj = m
-                return await ctx.send(f"{self.bot.icons['greenTick']} | {member.mention} is now the DJ.")
+        if (candidate := next(candidates, None)) is not None:
+            player.dj = ctx.guild.get_member(candidate)
+            player.now_playing.update()
+            return await ctx.send(f"{self.bot.icons['greenTick']} | {player.dj.mention} is now the DJ.")
 
 def setup(cog):
     cog.add_shard(Music(cog))
@@ -2,12 +2,12 @@ from utils._type import *
 
 import asyncio
 import re
+import time
 import wavelink
-import random
 
 from discord.ext import commands, menus
 from utils.useful import Cooldown, Embed, get_title
-from utils import paginations
+from utils import paginations, queries
 from cogs.Music.music import Track
 
 
@@ -18,69 +18,204 @@ class Playlist:
     def __init__(self, **kwargs):
         self.name = kwargs['name']
         self.id = kwargs['id']
-        self.length = kwargs['length']
-        self.songs = kwargs['songs'] # In tuples (song_name, url, song_id)
-
-    async def play(self, ctx: customContext, wavelink, player, requester, **kwargs):
+        self.owner = kwargs['owner']
+        self.songs = kwargs['songs'] # In tuples (song_name, url, song_id, encoded, length, author, thumbnail)
+
+    @property
+    def length(self):
+        return len(self.songs)
+
+    @staticmethod
+    def build_track(song, requester):
+        """Builds a Track straight from the blob stored with the song, without asking Lavalink."""
+        name, url, _, encoded, length, author, thumbnail = song
+        info = {
+            'title': name,
+            'uri': url,
+            'length': length,
+            'author': author,
+            'identifier': '',
+            'isStream': False,
+            'thumbnail': thumbnail
+        }
+        return Track(encoded, info, requester=requester)
+
+    async def play(self, ctx: customContext, resolver, player, requester, **kwargs):
+        """
+        Queues the songs of the playlist.
+        Songs with a stored track blob are queued right away, the rest is resolved
+        with at most `concurrency` lookups in flight. Tracks are queued in playlist order
+        and playback starts with the first one instead of waiting for the whole playlist.
+        """
         amt_of_songs = kwargs['songs']
-        msg = await ctx.reply(f"<a:loading:856978168476205066> | `(0/{amt_of_songs})` Queueing songs... please be patient.\n_This might take a while_")
+        semaphore = asyncio.Semaphore(kwargs.get('concurrency', 5))
+
+        async def resolve(index, query):
+            async with semaphore:
+                try:
+                    tracks = await resolver.get_tracks(query)
+                    return index, Track(tracks[0].id, tracks[0].info, requester=requester)
+                except Exception:
+                    return index, None
+
+        resolved = {}
+        next_index = 0
         loaded_songs = 0
-        player.loading = True
-        for song in self.songs:
-            if random.randint(0, 20) > 16:
-                await msg.edit(content=f"<a:loading:856978168476205066> | `({loaded_songs}/{amt_of_songs})` Queueing songs... please be patient.\n_This might take a while_")
-            tracks = await wavelink.get_tracks(song[1])
-            try:
-                track = Track(tracks[0].id, tracks[0].info, requester=requester)
-            except Exception as e:
-                await ctx.send(f"{song[0]} couldn't be loaded...")
-            else:
-                await player.queue.put(track)
-            loaded_songs += 1
-        player.loading = False
-        await msg.edit(content=f"<:greenTick:814504388139155477> | `({loaded_songs}/{amt_of_songs})` Queued songs! Now playing...")
-        await asyncio.sleep(0.5)
-        await player.play_next()
-
+        fails = []
 
-    async def remove_song(self, db, song_id):
-        songs = [tup[2] for tup in self.songs]
-        if song_id not in songs:
-            return None
-        query = "DELETE FROM playlist_songs WHERE song_id = ?"
-        cur = await db.execute(query, (song_id, ))
-        return cur.rowcount
+        def flush():
+            # Only hand over the contiguous prefix, so the queue keeps the playlist order
+            nonlocal next_index
+            while next_index in resolved:
+                track = resolved.pop(next_index)
+                if track is None:
+                    fails.append(self.songs[next_index][0])
+                else:
+                    player.queue.put_nowait(track)
+                    if not player.is_playing and not player.waiting:
+                        ctx.bot.loop.create_task(player.play_next())
+                next_index += 1
+
+        # While a source's circuit breaker is open, its songs are searched on the fallback source instead
+        health = ctx.bot.source_health
+        to_resolve = []
+        for index, song in enumerate(self.songs):
+            source = health.source_of(song[1])
+            if health.is_open(source) and (fallback := health.fallback_search(source, song[0])):
+                to_resolve.append((index, fallback))
+            elif song[3]:
+                resolved[index] = self.build_track(song, requester)
+                loaded_songs += 1
+            else:
+                to_resolve.append((index, song[1]))
 
+        if not to_resolve:
+            flush()
+            await ctx.reply(f"<:greenTick:814504388139155477> | `({loaded_songs}/{amt_of_songs})` Queued songs!")
+            return
 
+        msg = await ctx.reply(f"<a:loading:856978168476205066> | `({loaded_songs}/{amt_of_songs})` Queueing songs... please be patient.\n_This might take a while_")
+        last_edit = time.monotonic()
 
+        player.loading = True
+        tasks = [asyncio.create_task(resolve(index, query)) for index, query in to_resolve]
+        try:
+            flush()
+            for future in asyncio.as_completed(tasks):
+                index, track = await future
+                resolved[index] = track
+                loaded_songs += 1
+                flush()
+
+                if time.monotonic() - last_edit > 2 and loaded_songs < amt_of_songs:
+                    last_edit = time.monotonic()
+                    await msg.edit(content=f"<a:loading:856978168476205066> | `({loaded_songs}/{amt_of_songs})` Queueing songs... please be patient.\n_This might take a while_")
+        finally:
+            player.loading = False
+            for task in tasks:
+                task.cancel()
+
+        await msg.edit(content=f"<:greenTick:814504388139155477> | `({loaded_songs - len(fails)}/{amt_of_songs})` Queued songs!")
+        if fails:
+            more = f" and {len(fails) - 10} more" if len(fails) > 10 else ""
+            await ctx.send(f"{', '.join(fails[:10])}{more} couldn't be loaded...")
+
+
+class PlaylistRepository:
+    """
+    Every database access of the playlist commands.
+
+    A user's playlists, with their songs, are loaded by one indexed query and cached per user,
+    so ownership checks and fetches of one's own playlists don't touch the database at all.
+    Every mutation publishes an invalidation of the owner's entry on the bus.
+    """
+
+    def __init__(self, bot, *, maxsize: int = 1024, ttl: float = 1800):
+        self.bot = bot
+        self.cache = bot.cache.namespace("playlists", maxsize=maxsize, ttl=ttl, loader=self._load_user)
+        bot.bus.subscribe("playlists", self.forget)
+
+    @staticmethod
+    def _build(rows) -> Dict[int, Playlist]:
+        """Groups joined (playlist, song) rows, a playlist without songs comes with a single NULL song."""
+        playlists = {}
+        for playlist_id, name, owner, *song in rows:
+            if playlist_id not in playlists:
+                playlists[playlist_id] = Playlist(name=name, id=playlist_id, owner=owner, songs=[])
+            if song[2] is not None:
+                playlists[playlist_id].songs.append(tuple(song))
+        return playlists
+
+    async def _load_user(self, user_id: int) -> Dict[int, Playlist]:
+        return self._build(await self.bot.reads.fetchall(queries.USER_PLAYLISTS, (user_id, )))
+
+    def forget(self, user_id):
+        self.cache.pop(int(user_id), None)
+
+    async def invalidate(self, user_id: int):
+        await self.bot.bus.publish("playlists", user_id)
+
+    async def of_user(self, user_id: int) -> Dict[int, Playlist]:
+        return await self.cache.load(user_id, {})
+
+    async def fetch(self, playlist_id: int) -> Optional[Playlist]:
+        """Any playlist, with its owner and songs, or None if it doesn't exist."""
+        return self._build(await self.bot.reads.fetchall(queries.PLAYLIST, (playlist_id, ))).get(playlist_id)
+
+    async def owned(self, user_id: int, playlist_id: int) -> Tuple[Optional[Playlist], Optional[bool]]:
+        """
+        Returns `(playlist, True)` if the user owns the playlist,
+        `(None, False)` if someone else does and `(None, None)` if it doesn't exist.
+        """
+        if (playlist := (await self.of_user(user_id)).get(playlist_id)) is not None:
+            return playlist, True
+
+        row = await self.bot.reads.fetchone(queries.PLAYLIST_OWNER, (playlist_id, ))
+        return None, (False if row else None)
+
+    async def create(self, user_id: int, name: str) -> Optional[int]:
+        """The new playlist's ID, None once the user has 5 playlists."""
+        # The limit is checked in the same statement, so concurrent creates can't go over it
+        query = """
+                INSERT INTO playlists (user_id, playlist_name)
+                SELECT ?, ?
+                WHERE (SELECT Count(*) FROM playlists WHERE user_id = ?) < 5
+                RETURNING playlist_id
+                """
+        cur = await self.bot.db.execute(query, (user_id, name, user_id))
+        row = await cur.fetchone()
+        if row is None:
+            return None
 
-async def get_playlist(db, playlist_id: int):
-    query = """
-            SELECT playlist_song, playlist_url, song_id,
-                (
-                    SELECT playlist_name
-                    FROM playlists
-                    WHERE playlists.playlist_id = ?
-                )
-            FROM playlist_songs
-            WHERE playlist_id = (
-                SELECT playlist_id FROM playlists
-                WHERE playlist_id = ?
-            )
-            """
-    cur = await db.execute(query, (playlist_id, playlist_id))
-    data = await cur.fetchall()
+        await self.invalidate(user_id)
+        return row[0]
 
-    if not data:
-        return None
+    async def delete(self, playlist: Playlist):
+        self.bot.writes.enqueue("DELETE FROM playlist_songs WHERE playlist_id = ?", (playlist.id, ))
+        self.bot.writes.enqueue("DELETE FROM playlists WHERE playlist_id = ?", (playlist.id, ))
+        await self.bot.writes.flush()
+        await self.invalidate(playlist.owner)
 
-    playlist_info = {
-        "name": data[0][3],
-        "id": playlist_id,
-        "length": len(data),
-        "songs": [(name, url, song_id) for name, url, song_id, _ in data]
-    }
-    return Playlist(**playlist_info)
+    async def add_songs(self, playlist: Playlist, tracks: Iterable[Track]):
+        """Adds every track in one transaction."""
+        query = """
+                INSERT INTO playlist_songs (playlist_id, playlist_song, playlist_url, track_encoded, track_length, track_author, track_thumb)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """
+        self.bot.writes.enqueue_many(
+            query, ((playlist.id, track.title, track.uri, track.id, track.length, track.author, track.thumb) for track in tracks)
+        )
+        await self.bot.writes.flush()
+        await self.invalidate(playlist.owner)
+
+    async def remove_songs(self, playlist: Playlist, song_ids: Collection[int]) -> int:
+        """Deletes the songs of the playlist among `song_ids` with a single statement, returns how many were."""
+        if not song_ids:
+            return 0
+        query = queries.REMOVE_SONGS.format(queries.placeholders(len(song_ids)))
+        cur = await self.bot.db.execute(query, (playlist.id, *song_ids))
+        await self.invalidate(playlist.owner)
+        return cur.rowcount
 
 
 class Playlists(commands.Shard):
@@ -88,45 +223,61 @@ class Playlists(commands.Shard):
         super().__init__(cog)
         self.bot = cog.bot
 
-        # Playlists -
-    async def is_playlistOwner(self, user_id, playlist):
-        query = "SELECT user_id FROM playlists WHERE playlist_id = ?"
-        cur = await self.bot.db.execute(query, (playlist, ))
-        owner = await cur.fetchone()
-        if not owner:
-            return None
-        return user_id == owner[0]
+        if not hasattr(self.bot, 'playlists'):
+            self.bot.playlists = PlaylistRepository(self.bot, maxsize=self.bot.config.getint('Other', 'playlist_cache_size', fallback=1024))
 
-    async def new_id(self):
-        query = "SELECT playlist_id FROM playlists ORDER BY playlist_id DESC"
-        cur = await self.bot.db.execute(query)
-        _id = await cur.fetchone()
-        return (0 if not _id else _id[0]) + 1
+        self._backfill = self.bot.loop.create_task(self.backfill_songs())
 
-    async def new_song_id(self):
-        query = "SELECT song_id FROM playlist_songs ORDER BY song_id DESC"
-        cur = await self.bot.db.execute(query)
-        _id = await cur.fetchone()
-        return (0 if not _id else _id[0]) + 1
+    def shard_unload(self):
+        self._backfill.cancel()
+
+    async def backfill_songs(self):
+        """Resolves the songs that were added before track blobs were stored, a few at a time."""
+        await self.bot.wait_until_ready()
+        while not any(node.is_available for node in self.bot.wavelink.nodes.values()):
+            await asyncio.sleep(5)
+
+        cur = await self.bot.db.execute(queries.BACKFILL_SONGS)
+        urls = [row[0] for row in await cur.fetchall()]
+
+        query = """
+                UPDATE playlist_songs
+                SET track_encoded = ?, track_length = ?, track_author = ?, track_thumb = ?
+                WHERE playlist_url = ? AND track_encoded IS NULL
+                """
+        for url in urls:
+            try:
+                tracks = await self.bot.track_cache.get_tracks(url)
+            except Exception:
+                continue
+            if not tracks or isinstance(tracks, wavelink.TrackPlaylist):
+                continue
+            track = tracks[0]
+            self.bot.writes.enqueue(query, (track.id, track.length, track.author, track.thumb, url))
+            await asyncio.sleep(0.5)
+
+        if urls:
+            # Cached playlists were loaded without the blobs that were just stored
+            await self.bot.writes.flush()
+            self.bot.playlists.cache.clear()
+
+    # Playlists -
+    async def owned_playlist(self, ctx: customContext, playlist_id: int) -> Optional[Playlist]:
+        """The author's playlist, replies why not and returns None if it isn't theirs."""
+        playlist, owner = await self.bot.playlists.owned(ctx.author.id, playlist_id)
+        if owner is False:
+            await ctx.reply(f"{self.bot.icons['redTick']} | You do not own this playlist.")
+        elif owner is None:
+            await ctx.reply(f"{self.bot.icons['redTick']} | This playlist doesn't seem to exist.")
+        return playlist
 
 
     @commands.group(invoke_without_command=True, case_insensitive=True)
     async def playlist(self, ctx: customContext):
         """Shows the user's playlists."""
-        query = """
-                SELECT playlist_name, playlist_id,
-                (
-                    SELECT Count(*)
-                    FROM playlist_songs
-                    WHERE playlist_songs.playlist_id = playlists.playlist_id
-                )
-                FROM playlists
-                WHERE user_id = ?
-                """
-        cur = await self.bot.db.execute(query, (ctx.author.id, ))
-        playlists = await cur.fetchall()
+        playlists = (await self.bot.playlists.of_user(ctx.author.id)).values()
 
-        formatted = [f"{i+1}. Playlist **{playlist[0]}** with `ID {playlist[1]}` and `{playlist[2]}` songs" for i, playlist in enumerate(playlists)]
+        formatted = [f"{i+1}. Playlist **{playlist.name}** with `ID {playlist.id}` and `{playlist.length}` songs" for i, playlist in enumerate(playlists)]
         em = Embed(
             description="\n".join(formatted)
         )
@@ -137,9 +288,9 @@ class Playlists(commands.Shard):
     @playlist.command(name="info", usage="<id> [page]")
     async def _playlist_info(self, ctx: customContext, playlist_id: int):
         """Shows information about a playlist."""
-        playlist = await get_playlist(self.bot.db, playlist_id)
+        playlist = (await self.bot.playlists.of_user(ctx.author.id)).get(playlist_id) or await self.bot.playlists.fetch(playlist_id)
 
-        if not playlist:
+        if not playlist or not playlist.songs:
             return await ctx.reply(f"{self.bot.icons['redTick']} | No playlist data was found with `ID {playlist_id}` (Empty or does not exist)")
 
         entries = [f"`ID {tup[2]}`. [{get_title(tup[0])}]({tup[1]})" for tup in playlist.songs]
@@ -150,58 +301,47 @@ class Playlists(commands.Shard):
     @commands.check(Cooldown(1, 60, 1, 30, commands.BucketType.user))
     async def _playlist_create(self, ctx: customContext, *, name):
         """Creates a playlist."""
-        query = "SELECT Count(*) FROM playlists WHERE user_id = ?"
-        cur = await self.bot.db.execute(query, (ctx.author.id, ))
-        number_of_playlists = await cur.fetchone()
+        _id = await self.bot.playlists.create(ctx.author.id, name)
 
-        if number_of_playlists[0] == 5:
+        if _id is None:
             return await ctx.reply(f"{self.bot.icons['redTick']} | You only can have up to 5 playlists")
 
-        query = "INSERT INTO playlists VALUES (?, ?, ?)"
-        _id = await self.new_id()
-        cur = await self.bot.db.execute(query, (ctx.author.id, name, _id))
-
         await ctx.reply(f"{self.bot.icons['greenTick']} | Created playlist **{name}** with `ID {_id}`")
 
     @playlist.command(name="delete", aliases=["del"], usage="<id>")
     async def _playlist_delete(self, ctx: customContext, playlist_id: int):
         """Deletes a playlist."""
-        if check := await self.is_playlistOwner(ctx.author.id, playlist_id) is False:
-            return await ctx.reply(f"{self.bot.icons['redTick']} | You do not own this playlist.")
-        elif check is None:
-            return await ctx.reply(f"{self.bot.icons['redTick']} | This playlist doesn't seem to exist.")
-
-        queries = ["DELETE FROM playlist_songs WHERE playlist_id = ?", "DELETE FROM playlists WHERE playlist_id = ?"]
-        for query in queries:
-            await self.bot.db.execute(query, (playlist_id, ))
+        if not (playlist := await self.owned_playlist(ctx, playlist_id)):
+            return
+
+        await self.bot.playlists.delete(playlist)
         await ctx.reply(f"{self.bot.icons['greenTick']} | Deleted playlist with `ID {playlist_id}`")
 
-    @playlist.command(name="addsong", usage="<playlist ID> <song>")
+    @playlist.command(name="addsong", usage="<playlist ID> <song/playlist URL>")
     async def _playlist_addsong(self, ctx: customContext, playlist_id:int, *, query):
-        """Adds a song to a playlist."""
-        if (check := await self.is_playlistOwner(ctx.author.id, playlist_id)) is False:
-            return await ctx.reply(f"{self.bot.icons['redTick']} | You do not own this playlist.")
-        elif check is None:
-            return await ctx.reply(f"{self.bot.icons['redTick']} | This playlist doesn't seem to exist.")
-
-        query.strip('<>')
+        """
+        Adds a song to a playlist.
+        Given a playlist URL, every song of that playlist is added.
+        """
+        if not (playlist := await self.owned_playlist(ctx, playlist_id)):
+            return
+
+        query = query.strip('<>')
         if not URL_REG.match(query):
             query = f'ytsearch:{query}'
 
-        tracks = await self.bot.wavelink.get_tracks(query)
+        tracks = await self.bot.track_cache.get_tracks(query)
 
         if not tracks:
             return await ctx.reply(f"{self.bot.icons['redTick']} | The provided song was invalid. Try again with a different URL.")
 
         if isinstance(tracks, wavelink.TrackPlaylist):
-            return await ctx.reply(f"{self.bot.icons['redTick']} | You can not add a playlist to a playlist...")
+            songs = [Track(track.id, track.info, requester=ctx.author) for track in tracks.tracks]
+            await self.bot.playlists.add_songs(playlist, songs)
+            await ctx.reply(f"{self.bot.icons['plus']} | Added `{len(songs)}` songs from **{tracks.data['playlistInfo']['name']}** to playlist with `ID {playlist_id}`.")
         else:
             track = Track(tracks[0].id, tracks[0].info, requester=ctx.author)
-            query = """
-                    INSERT INTO playlist_songs
-                    VALUES (?, ?, ?, ?)
-                    """
-            await self.bot.db.execute(query, (playlist_id, track.title, track.uri, await self.new_song_id()))
+            await self.bot.playlists.add_songs(playlist, [track])
             await ctx.reply(f"{self.bot.icons['plus']} | Added the song **{track.title}** to playlist with `ID {playlist_id}`.\nSong url: <{track.uri}>")
 
 
@@ -210,27 +350,21 @@ class Playlists(commands.Shard):
         """Removes a song from a playlist."""
         if not songs:
             raise commands.BadArgument(f"{self.bot.icons['redTick']} | Please supply a song id or a list of song ID's seperated by spaces.")
-        if check := await self.is_playlistOwner(ctx.author.id, playlist_id) is False:
-            return await ctx.reply(f"{self.bot.icons['redTick']} | You do not own this playlist.")
-        elif check is None:
-            return await ctx.reply(f"{self.bot.icons['redTick']} | This playlist doesn't seem to exist.")
+        for song_id in songs:
+            if not song_id.isdigit():
+                raise commands.BadArgument(f"{self.bot.icons['redTick']} | `{song_id}` is not a valid ID.")
 
-        playlist = await get_playlist(self.bot.db, playlist_id)
+        if not (playlist := await self.owned_playlist(ctx, playlist_id)):
+            return
 
-        if not playlist:
+        if not playlist.songs:
             return await ctx.reply(f"{self.bot.icons['redTick']} | No playlist data was found with `ID {playlist_id}` (Empty or does not exist)")
 
-        affected_rows = 0
-        fails = []
-        for song_id in songs:
-            try:
-                res = await playlist.remove_song(self.bot.db, int(song_id))
-            except ValueError:
-                raise commands.BadArgument(f"{self.bot.icons['redTick']} | `{song_id}` is not a valid ID.")
-            if res is None:
-                fails.append(song_id)
-            else:
-                affected_rows += res
+        in_playlist = {song[2] for song in playlist.songs}
+        to_remove = {int(song_id) for song_id in songs if int(song_id) in in_playlist}
+        fails = [song_id for song_id in songs if int(song_id) not in in_playlist]
+
+        affected_rows = await self.bot.playlists.remove_songs(playlist, to_remove)
 
         if fails:
             await ctx.reply(f"{self.bot.icons['redTick']} | The song(s) with `ID {', '.join(fails)}` does not belong to the playlist you supplied. Deleted **{affected_rows}** songs.")
@@ -241,18 +375,25 @@ class Playlists(commands.Shard):
     @commands.check(Cooldown(1, 60, 1, 30, commands.BucketType.user))
     async def _playlist_play(self, ctx: customContext, playlist_id: int):
         """Plays the songs in a playlist."""
-        if (check := await self.is_playlistOwner(ctx.author.id, playlist_id)) is False:
-            return await ctx.reply(f"{self.bot.icons['redTick']} | You do not own this playlist.")
-        elif check is None:
-            return await ctx.reply(f"{self.bot.icons['redTick']} | This playlist doesn't seem to exist.")
+        if not (playlist := await self.owned_playlist(ctx, playlist_id)):
+            return
+
+        if not playlist.songs:
+            return await ctx.reply(f"{self.bot.icons['redTick']} | No playlist data was found with `ID {playlist_id}` (Empty or does not exist)")
 
         player = self.bot.get_cog("Music").get_player(ctx)
 
         if not player.is_connected:
             await ctx.invoke(self.bot.get_cog("Music")._connect, invoked_from=ctx.command)
 
-        playlist = await get_playlist(self.bot.db, playlist_id)
-        await playlist.play(ctx, self.bot.wavelink, self.bot.get_cog("Music").get_player(ctx), requester=ctx.author, songs=playlist.length)
+        await playlist.play(
+            ctx,
+            self.bot.track_cache,
+            self.bot.get_cog("Music").get_player(ctx),
+            requester=ctx.author,
+            songs=playlist.length,
+            concurrency=self.bot.config.getint('Other', 'resolve_concurrency', fallback=5)
+        )
 
 
 def setup(cog):
@@ -25,6 +25,9 @@ class API(commands.Shard):
 
         self.update_stats.start()
 
+    def shard_unload(self):
+        self.update_stats.cancel()
+
     @tasks.loop(minutes=10)
     async def update_stats(self):
         """
@@ -14,10 +14,11 @@ class Core(commands.Shard):
     def __init__(self, cog: commands.Cog):
         super().__init__(cog)
         self.bot = cog.bot
-        self.cache = {}
-        self.cache_usage = {}
         self.loops.start()
 
+    def shard_unload(self):
+        self.loops.cancel()
+
     async def send_error(self, ctx: customContext, exc_info: dict):
         em = Embed(
             title=f"{self.bot.icons['redTick']} Error while running command {exc_info['command']}",
@@ -165,7 +166,7 @@ class Core(commands.Shard):
         }
 
         await self.handle_error(ctx, exc_info)
-        self.bot.logger.exception(exc_info['error'])
+        self.bot.logger.error(f"Ignoring exception in command {ctx.command}:\n{exc_info['error']}")
 
     @commands.Cog.listener()
     async def on_message(self, message):
@@ -180,24 +181,27 @@ class Core(commands.Shard):
     async def on_guild_join(self, guild):
         self.bot.logger.info(f'Joined guild {guild.name}')
         query_a = "INSERT INTO guilds VALUES (?)"
-        await self.bot.db.execute(query_a, (guild.id,))
+        self.bot.writes.enqueue(query_a, (guild.id,))
         query_b = "INSERT INTO guild_config (guild_id) VALUES (?)"
-        await self.bot.db.execute(query_b, (guild.id,))
+        self.bot.writes.enqueue(query_b, (guild.id,))
 
     @commands.Cog.listener()
     async def on_guild_remove(self, guild):
         self.bot.logger.info(f'Left guild {guild.name}')
         query_c = "DELETE FROM guilds WHERE guild_id = ?"
-        await self.bot.db.execute(query_c, (guild.id,))
+        self.bot.writes.enqueue(query_c, (guild.id,))
 
     @commands.Cog.listener()
     async def on_command(self, ctx: customContext):
-        try:
-            self.cache[str(ctx.author.id)] += 1
-            self.cache_usage[str(ctx.command.name)] += 1
-        except KeyError:
-            self.cache[str(ctx.author.id)] = 1
-            self.cache_usage[str(ctx.command.name)] = 1
+        self.bot.usage.started(ctx)
+
+    @commands.Cog.listener()
+    async def on_command_completion(self, ctx: customContext):
+        self.bot.usage.finished(ctx)
+
+    @commands.Cog.listener("on_command_error")
+    async def record_failed_command(self, ctx: customContext, error):
+        self.bot.usage.finished(ctx)
 
     @tasks.loop(minutes=1)
     async def loops(self):
@@ -209,29 +213,9 @@ class Core(commands.Shard):
             )
         )
 
-        for item in self.cache:
-            query_user_data = """
-                              INSERT INTO users_data (user_id, commands_ran)
-                              VALUES ((?), ?)
-                              ON CONFLICT(user_id) DO UPDATE SET commands_ran = commands_ran+?
-                              """
-            await self.bot.db.execute(
-                query_user_data, (int(item), self.cache[item], self.cache[item])
-            )
-        self.cache = {}
-
-        for item in self.cache_usage:
-            query = """
-                    INSERT INTO usage (command, counter)
-                    VALUES ((?), ?)
-                    ON CONFLICT(command) DO UPDATE SET counter = counter+?
-                    """
-
-            await self.bot.db.execute(
-                query, (str(item), self.cache_usage[item], self.cache_usage[item])
-            )
-
-        self.cache_usage = {}
+        # Both tables are updated with one executemany each, in a single transaction
+        self.bot.usage.flush()
+        await self.bot.writes.flush()
 
 
     @loops.before_loop
@@ -108,7 +108,7 @@ class Developer(commands.Shard):
         # Stuff to do first before start
         async with ctx.processing(ctx, message="Restarting bot...") as process:
             await self.git(arguments="pull")
-            await self.bot.db.commit()
+            await self.bot.shutdown()
 
         data = read_json("config")
         data['messages']['lastMessage'] = process.m.id
@@ -121,13 +121,21 @@ class Developer(commands.Shard):
         """'Syncs' the bot by reloading all the cogs and pulling from GitHub"""
 
         text = await self.git(arguments="pull")
+        self.bot.reload_config()
         fail = ""
 
         async with ctx.typing():
             for file in os.listdir(f"{self.bot.cwd}/cogs"):
-                if file.endswith(".py") and file[:-3] not in self.bot.non_sync:
+                if file.endswith(".py"):
+                    name = file[:-3]
+                elif os.path.isfile(f"{self.bot.cwd}/cogs/{file}/__init__.py"):
+                    name = file
+                else:
+                    continue
+
+                if name.lower() not in self.bot.non_sync:
                     try:
-                        self.bot.reload_extension(f"cogs.{file[:-3]}")
+                        self.bot.reload_extension(f"cogs.{name}")
                     except discord.ext.commands.ExtensionNotLoaded as e:
                         fail += f"```diff\n- {e.name} is not loaded```"
                     except discord.ext.commands.ExtensionFailed as e:
@@ -213,6 +221,15 @@ class Developer(commands.Shard):
             await ctx.message.add_reaction(f"{self.bot.icons['redTick']}")
             await ctx.send(str.capitalize(str(error.original)))
 
+    @dev.command(name="queryplan", aliases=["qp"])
+    async def _queryplan(self, ctx: customContext):
+        """Shows the query plan of every hot query, flagging full table scans."""
+        lines = []
+        for name, plan in (await self.bot.migrator.query_plans()).items():
+            scans = self.bot.migrator.full_scans(plan)
+            lines.append(f"{'-' if scans else '+'} {name}: {' | '.join(plan)}")
+        await ctx.send("```diff\n" + "\n".join(lines) + "```")
+
     @dev.command(name="git")
     async def _git(self, ctx: customContext, *, arguments):
         text = await self.git(arguments=arguments)
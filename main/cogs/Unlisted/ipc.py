@@ -23,7 +23,11 @@ class Ipc(commands.Shard):
             "users": len(self.bot.users),
             "guilds": len(self.bot.guilds),
             "commands": len(list(self.bot.walk_commands())),
-            "uptime": humanize.precisedelta(discord.utils.utcnow() - self.bot.launch_time, format='%.0f')
+            "uptime": humanize.precisedelta(discord.utils.utcnow() - self.bot.launch_time, format='%.0f'),
+            "messages": dict(self.bot.message_stats),
+            "cache": self.bot.cache.stats(),
+            "writes": self.bot.writes.stats,
+            "usage": self.bot.usage.stats
         }
         return stats
 
@@ -37,23 +37,22 @@ class Moderator(commands.Shard):
 
         target_type = "user" if isinstance(target, discord.User) else "guild"
 
-        blacklist = "TRUE" if flags.mode == "add" else "FALSE"
+        blacklist = 1 if flags.mode == "add" else 0
+        # Upserts, the target may not have a row yet
         query = (
-            "UPDATE users_data SET blacklisted = ? WHERE user_id = ?"
+            "INSERT INTO users_data (user_id, blacklisted) VALUES (?, ?) ON CONFLICT(user_id) DO UPDATE SET blacklisted = excluded.blacklisted"
             if target_type == "user"
-            else "UPDATE guild_config SET blacklisted = ? WHERE guild_id = ?"
+            else "INSERT INTO guild_config (guild_id, blacklisted) VALUES (?, ?) ON CONFLICT(guild_id) DO UPDATE SET blacklisted = excluded.blacklisted"
         )
 
-        cur = await self.bot.db.execute(query, (blacklist, target.id))
+        await self.bot.db.execute(query, (target.id, blacklist))
         if flags.mode == "add":
             msg = f"**{target.name}** now got blacklisted! bad bad bad"
-            self.bot.cache["blacklisted_users"].add(target.id)
-        else:
+        elif target.id in self.bot.cache["blacklisted_users"]:
             msg = f"**{target.name}** now got unblacklisted! phew..."
-            try:
-                self.bot.cache["blacklisted_users"].remove(target.id)
-            except KeyError:
-                msg = f"{target.name} is not blacklisted!"
+        else:
+            msg = f"{target.name} is not blacklisted!"
+        await self.bot.bus.publish("blacklisted_users", target.id)
 
         await ctx.send(msg)
 
@@ -74,23 +73,22 @@ class Moderator(commands.Shard):
 
         target_type = "user" if isinstance(target, discord.User) else "guild"
 
-        premium = "TRUE" if flags.mode == "add" else "FALSE"
+        premium = 1 if flags.mode == "add" else 0
+        # Upserts, the target may not have a row yet
         query = (
-            "UPDATE users_data SET premium = ? WHERE user_id = ?"
+            "INSERT INTO users_data (user_id, premium) VALUES (?, ?) ON CONFLICT(user_id) DO UPDATE SET premium = excluded.premium"
             if target_type == "user"
-            else "UPDATE guild_config SET premium = ? WHERE guild_id = ?"
+            else "INSERT INTO guild_config (guild_id, premium) VALUES (?, ?) ON CONFLICT(guild_id) DO UPDATE SET premium = excluded.premium"
         )
 
-        cur = await self.bot.db.execute(query, (premium, target.id))
+        await self.bot.db.execute(query, (target.id, premium))
         if flags.mode == "add":
             msg = f"<:Boosters:814930829461553152> **{target.name}** now got premium perks!"
-            self.bot.cache["premium_users"].add(target.id)
-        else:
+        elif target.id in self.bot.cache["premium_users"]:
             msg = f"<:Boosters:814930829461553152> **{target.name}** got their premium removed. oof..."
-            try:
-                self.bot.cache["premium_users"].remove(target.id)
-            except KeyError:
-                msg = f"{target.name} is not premium!"
+        else:
+            msg = f"{target.name} is not premium!"
+        await self.bot.bus.publish("premium_users", target.id)
 
         await ctx.send(msg)
 
@@ -2,13 +2,14 @@ from utils._type import *
 
 import asyncio
 import ast
-import aiosqlite
 import discord
+import heapq
 import textwrap
 
 from discord.ext import commands
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from dateparser.search import search_dates
+from utils import queries
 from discord.ext import commands
 
 class ParsedTime:
@@ -65,8 +66,16 @@ class Timer:
         self.kwargs = extra.get('kwargs', {})
         self.event = record['event']
 
-        self.created_at = datetime.strptime(record['created'], '%Y-%m-%d %H:%M:%S.%f%z')
-        self.expires = datetime.strptime(record['expires'], '%Y-%m-%d %H:%M:%S.%f%z')
+        self.created_at = self.parse(record['created'])
+        self.expires = self.parse(record['expires'])
+
+    @staticmethod
+    def parse(value) -> datetime:
+        """UTC-aware datetime of a stored timestamp, older rows were saved without an offset."""
+        date = value if isinstance(value, datetime) else datetime.fromisoformat(str(value))
+        if date.tzinfo is None:
+            return date.replace(tzinfo=timezone.utc)
+        return date.astimezone(timezone.utc)
 
     def __hash__(self):
         return hash(self.id)
@@ -93,50 +102,74 @@ class Timer:
         return cls(record=pseudo)
 
 class Reminders(commands.Shard):
+    """
+    Timers due within the next `WINDOW` seconds are kept in a min-heap ordered by expiry,
+    loaded with one query per window. Every timer that is due is dispatched in one batch,
+    after a single DELETE of the whole batch.
+    New timers inside the window are pushed onto the heap, the dispatcher is only woken up.
+    """
+
+    WINDOW = 3600
+    COLUMNS = queries.TIMER_COLUMNS
+
     def __init__(self, cog: commands.Cog):
         super().__init__(cog)
         self.bot = cog.bot
-        self._have_data = asyncio.Event(loop=self.bot.loop)
-        self._current_timer = None
+        self._heap: List[Tuple[datetime, int, Timer]] = []
+        self._loaded_until: Optional[datetime] = None
+        self._wakeup = asyncio.Event()
         self._task = self.bot.loop.create_task(self.dispatch_timers())
 
-    def cog_unload(self):
+    def shard_unload(self):
         self._task.cancel()
 
-    async def get_current_timer(self, days=7):
-        query = query = "SELECT * FROM timers WHERE expires < (date(CURRENT_TIMESTAMP, ?)) ORDER BY expires LIMIT 1"
-        self.bot.db.row_factory = aiosqlite.Row
-        cur = await self.bot.db.execute(query, (f'+{days} days',))
-        record = await cur.fetchone()
-        self.bot.db.row_factory = None
-        # TODO: type: str in self._current_timer
-        return Timer(record=record) if record else None
-
-    async def wait_for_timers(self, days=7):
-        timer = await self.get_current_timer(days=days)
-        if timer is not None:
-            self._have_data.set()
-            return timer
-        self._have_data.clear()
-        self._current_timer = None
-        await self._have_data.wait()
-        return await self.get_current_timer(days=days)
-
-    async def call_timer(self, timer: Timer):
-        query = "DELETE FROM timers WHERE id = ?"
-        await self.bot.db.execute(query, (timer.id,))
+    async def load_window(self):
+        """Replaces the heap with every timer that expires before the end of the next window."""
+        until = discord.utils.utcnow() + timedelta(seconds=self.WINDOW)
+        rows = await self.bot.reads.fetchall(queries.DUE_TIMERS, (int(until.timestamp()),))
+
+        loaded = {row[0]: Timer(record=dict(zip(self.COLUMNS, row))) for row in rows}
+        # Keep timers pushed by create_timer while the query was running
+        heap = [(timer.expires, timer.id, timer) for timer in loaded.values()]
+        heap.extend(entry for entry in self._heap if entry[1] not in loaded)
+        heapq.heapify(heap)
+        self._heap = heap
+        self._loaded_until = until
+
+    def due_timers(self) -> List[Timer]:
+        now = discord.utils.utcnow()
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            due.append(heapq.heappop(self._heap)[2])
+        return due
+
+    async def call_timers(self, timers: List[Timer]):
+        # Chunked to stay below SQLite's limit of bound parameters
+        for i in range(0, len(timers), 500):
+            chunk = timers[i:i + 500]
+            query = queries.DELETE_TIMERS.format(queries.placeholders(len(chunk)))
+            await self.bot.db.execute(query, [timer.id for timer in chunk])
+
+        for timer in timers:
+            self.bot.dispatch(f'{timer.event}_timer_complete', timer)
 
-        event = f'{timer.event}_timer_complete'
-        self.bot.dispatch(event, timer)
     async def dispatch_timers(self):
         try:
+            await self.bot.wait_until_ready()
             while not self.bot.is_closed():
-                timer = self._current_timer = await self.wait_for_timers(days=40)
-                now = datetime.utcnow()
-                if timer.expires >= now:
-                    to_sleep = (timer.expires - now).total_seconds()
-                    await asyncio.sleep(to_sleep)
-                await self.call_timer(timer)
+                if self._loaded_until is None or discord.utils.utcnow() >= self._loaded_until:
+                    await self.load_window()
+
+                if timers := self.due_timers():
+                    await self.call_timers(timers)
+                    continue
+
+                wake_at = min(self._heap[0][0], self._loaded_until) if self._heap else self._loaded_until
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=(wake_at - discord.utils.utcnow()).total_seconds())
+                except asyncio.TimeoutError:
+                    pass
         except asyncio.CancelledError:
             raise
         except (OSError, discord.ConnectionClosed):
@@ -152,30 +185,30 @@ class Reminders(commands.Shard):
         try:
             now = kwargs.pop('created')
         except KeyError:
-            now = datetime.utcnow()
+            now = discord.utils.utcnow()
 
         timer = Timer.temporary(event=event, author=author, args=args, kwargs=kwargs, expires=str(expires), created=str(now))
+        expires, now = timer.expires, timer.created_at
         delta = (expires - now).total_seconds()
         if delta <= 60:
             self.bot.loop.create_task(self.short_timer(delta, timer))
             return timer
 
         query = """
-                INSERT INTO timers (event, author, extra, expires, created)
-                VALUES (?, ?, ?, ?, ?)
+                INSERT INTO timers (event, author, extra, expires, created, expires_at)
+                VALUES (?, ?, ?, ?, ?, ?)
                 RETURNING id
                 """
 
-        cur = await self.bot.db.execute(query, (event, author, str({ "args": args, "kwargs": kwargs }), expires, now))
+        cur = await self.bot.db.execute(query, (event, author, str({ "args": args, "kwargs": kwargs }), expires, now, int(expires.timestamp())))
         row = await cur.fetchone()
         timer.id = row[0]
 
-        if delta <= (86400*40): # 40 days
-            self._have_data.set()
-
-        if self._current_timer and expires < self._current_timer.expires:
-            self._task.cancel()
-            self._task = self.bot.loop.create_task(self.dispatch_timers())
+        # Later timers are picked up when their window is loaded
+        if self._loaded_until is None or expires < self._loaded_until:
+            heapq.heappush(self._heap, (timer.expires, timer.id, timer))
+            if self._heap[0][1] == timer.id:
+                self._wakeup.set()
         return timer
 
     @commands.group(name='reminder', aliases=['remindme', 'remind'], usage='<when>', invoke_without_command=True)
@@ -199,12 +232,11 @@ class Reminders(commands.Shard):
         query = """SELECT id, expires, extra
                     FROM timers
                     WHERE event = 'reminder' and author = ?
-                    ORDER BY expires
+                    ORDER BY expires_at
                     LIMIT 10;
                 """
 
-        cur = await self.bot.db.execute(query, (ctx.author.id,))
-        records = await cur.fetchall()
+        records = await self.bot.reads.fetchall(query, (ctx.author.id,))
 
         if len(records) == 0:
             return await ctx.send('No currently running reminders.')
@@ -219,7 +251,7 @@ class Reminders(commands.Shard):
         for _id, expires, extra in records:
             message = ast.literal_eval(extra)['args'][1]
             shorten = textwrap.shorten(message, width=512)
-            date = datetime.strptime(expires, '%Y-%m-%d %H:%M:%S.%f%z')
+            date = Timer.parse(expires)
             e.add_field(name=f'{_id}: <t:{int(date.timestamp())}:R>', value=shorten, inline=False)
 
         await ctx.send(embed=e)
@@ -5,6 +5,7 @@ import sqlite3
 import time
 
 from discord.ext import commands
+from utils import queries
 
 
 class Tags(commands.Shard):
@@ -17,16 +18,13 @@ class Tags(commands.Shard):
         """Sends a tag."""
         tag = tag.lower()
 
-        query = "SELECT tag_content FROM tags WHERE tag_guild_id = ? AND tag_name = ?"
-        cur = await self.bot.db.execute(query, (ctx.guild.id, tag))
-        row = await cur.fetchone()
+        row = await self.bot.reads.fetchone(queries.TAG, (ctx.guild.id, tag))
 
         if not row:
-            cur = await self.bot.db.execute(
+            row = await self.bot.reads.fetchall(
                 "SELECT tag_name FROM tags WHERE tag_guild_id = ? AND tag_name LIKE ?",
                 (ctx.guild.id, f"%{tag}%"),
             )
-            row = await cur.fetchall()
             if not row:
                 return await ctx.send("Tag not found.")
             else:
@@ -85,8 +83,7 @@ class Tags(commands.Shard):
         """Deletes a tag."""
 
         tag = tag.lower()
-        query = "SELECT tag_author FROM tags WHERE tag_name = ? AND tag_guild_id = ?"
-        cur = await self.bot.db.execute(query, (tag, ctx.guild.id))
+        cur = await self.bot.db.execute(queries.TAG_OWNER, (tag, ctx.guild.id))
         data = await cur.fetchone()
         if data is None:
             return await ctx.send(f"{self.bot.icons['redTick']} No tag is found called `{tag}`.")
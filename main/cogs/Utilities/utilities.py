@@ -24,8 +24,8 @@ class Utilities(commands.Shard):
         super().__init__(cog)
         self.bot = cog.bot
         self.index = 0
-        self.snipe_cache = {}
-        self.esnipe_cache = {}
+        self.snipe_cache = self.bot.cache.namespace("snipes", maxsize=1000)
+        self.esnipe_cache = self.bot.cache.namespace("edit_snipes", maxsize=1000)
 
     @commands.Cog.listener()
     async def on_message_edit(self, before, after):
@@ -0,0 +1 @@
+# Lets the tests import `utils` the way the bot does, from this directory
@@ -0,0 +1,83 @@
+-- The tables as they existed before migrations were tracked, in SQLite syntax.
+-- Everything is IF NOT EXISTS, existing databases are left untouched.
+CREATE TABLE IF NOT EXISTS guilds (
+    guild_id BIGINT PRIMARY KEY
+);
+
+CREATE TABLE IF NOT EXISTS usage (
+    command TEXT PRIMARY KEY,
+    counter INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS frozen_names (
+    guild_id BIGINT REFERENCES guilds ON DELETE CASCADE,
+    user_id BIGINT,
+    frozen_name VARCHAR(32),
+    PRIMARY KEY (guild_id, user_id)
+);
+
+CREATE TABLE IF NOT EXISTS guild_config (
+    guild_id BIGINT REFERENCES guilds ON DELETE CASCADE,
+    prefix VARCHAR DEFAULT 'g.',
+    grole BIGINT,
+    premium BOOL DEFAULT 0,
+    blacklisted BOOL DEFAULT 0,
+    PRIMARY KEY (guild_id)
+);
+
+CREATE TABLE IF NOT EXISTS tags (
+    tag_guild_id BIGINT REFERENCES guilds ON DELETE CASCADE,
+    tag_name VARCHAR(32),
+    tag_content TEXT NOT NULL,
+    tag_author BIGINT NOT NULL,
+    tag_uses INT DEFAULT 0 NOT NULL,
+    tag_creation_date INT NOT NULL,
+    tag_aliases TEXT,
+    UNIQUE (tag_guild_id, tag_name)
+);
+
+CREATE TABLE IF NOT EXISTS users_data (
+    user_id BIGINT,
+    commands_ran BIGINT,
+    blacklisted BOOL DEFAULT 0,
+    tips BOOL DEFAULT 0,
+    premium BOOL DEFAULT 0,
+    mentions BOOL DEFAULT 0,
+    PRIMARY KEY (user_id)
+);
+
+CREATE TABLE IF NOT EXISTS disabled_commands (
+    snowflake_id BIGINT,
+    command_name TEXT,
+    PRIMARY KEY (snowflake_id, command_name)
+);
+
+CREATE TABLE IF NOT EXISTS item_info (
+    item_id INTEGER PRIMARY KEY NOT NULL,
+    item_price INTEGER NOT NULL,
+    item_name TEXT NOT NULL,
+    item_description TEXT NOT NULL,
+    item_brief TEXT
+);
+
+CREATE TABLE IF NOT EXISTS playlists (
+    user_id BIGINT NOT NULL,
+    playlist_name VARCHAR(32) NOT NULL,
+    playlist_id INT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS playlist_songs (
+    playlist_id INT NOT NULL,
+    playlist_song TEXT NOT NULL,
+    playlist_url TEXT NOT NULL,
+    song_id INT NOT NULL DEFAULT -1
+);
+
+CREATE TABLE IF NOT EXISTS timers (
+    id INTEGER PRIMARY KEY,
+    expires TIMESTAMP NOT NULL,
+    created TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    event TEXT NOT NULL,
+    extra TEXT,
+    author BIGINT
+);
@@ -0,0 +1,17 @@
+-- The flag columns used to hold the strings "TRUE"/"FALSE", they are 0/1 from now on.
+-- Only the set rows are ever looked up, so they get partial indexes.
+ALTER TABLE users_data ADD COLUMN mentions BOOL DEFAULT 0;
+
+UPDATE guild_config SET blacklisted = (blacklisted = 'TRUE') WHERE typeof(blacklisted) = 'text';
+UPDATE guild_config SET premium = (premium = 'TRUE') WHERE typeof(premium) = 'text';
+UPDATE users_data SET blacklisted = (blacklisted = 'TRUE') WHERE typeof(blacklisted) = 'text';
+UPDATE users_data SET premium = (premium = 'TRUE') WHERE typeof(premium) = 'text';
+UPDATE users_data SET tips = (tips = 'TRUE') WHERE typeof(tips) = 'text';
+UPDATE users_data SET mentions = (mentions = 'TRUE') WHERE typeof(mentions) = 'text';
+
+CREATE INDEX IF NOT EXISTS guild_config_blacklisted_idx ON guild_config (guild_id) WHERE blacklisted = 1;
+CREATE INDEX IF NOT EXISTS guild_config_premium_idx ON guild_config (guild_id) WHERE premium = 1;
+CREATE INDEX IF NOT EXISTS users_data_blacklisted_idx ON users_data (user_id) WHERE blacklisted = 1;
+CREATE INDEX IF NOT EXISTS users_data_premium_idx ON users_data (user_id) WHERE premium = 1;
+CREATE INDEX IF NOT EXISTS users_data_tips_idx ON users_data (user_id) WHERE tips = 1;
+CREATE INDEX IF NOT EXISTS users_data_mentions_idx ON users_data (user_id) WHERE mentions = 1;
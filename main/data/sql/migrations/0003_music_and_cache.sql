@@ -0,0 +1,25 @@
+-- Tables (and columns) that used to be created on the fly by the music shards and the cache bus.
+ALTER TABLE playlist_songs ADD COLUMN track_encoded TEXT;
+ALTER TABLE playlist_songs ADD COLUMN track_length INT;
+ALTER TABLE playlist_songs ADD COLUMN track_author TEXT;
+ALTER TABLE playlist_songs ADD COLUMN track_thumb TEXT;
+
+CREATE TABLE IF NOT EXISTS track_cache (
+    query TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    cached_at INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS player_snapshots (
+    guild_id BIGINT PRIMARY KEY,
+    data TEXT NOT NULL,
+    saved_at INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS cache_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    origin TEXT NOT NULL,
+    namespace TEXT NOT NULL,
+    key,
+    created_at INTEGER NOT NULL
+);
@@ -0,0 +1,10 @@
+-- Indexes for the lookups done on every command, these were all full table scans.
+CREATE INDEX IF NOT EXISTS playlists_user_id_idx ON playlists (user_id);
+CREATE INDEX IF NOT EXISTS playlists_playlist_id_idx ON playlists (playlist_id);
+CREATE INDEX IF NOT EXISTS playlist_songs_playlist_id_idx ON playlist_songs (playlist_id);
+CREATE INDEX IF NOT EXISTS playlist_songs_song_id_idx ON playlist_songs (song_id);
+CREATE INDEX IF NOT EXISTS playlist_songs_url_idx ON playlist_songs (playlist_url) WHERE track_encoded IS NULL;
+CREATE INDEX IF NOT EXISTS disabled_commands_command_idx ON disabled_commands (command_name);
+CREATE INDEX IF NOT EXISTS timers_expires_idx ON timers (expires);
+CREATE INDEX IF NOT EXISTS track_cache_cached_at_idx ON track_cache (cached_at);
+CREATE INDEX IF NOT EXISTS cache_events_created_at_idx ON cache_events (created_at);
@@ -0,0 +1,20 @@
+-- tags had a primary key over the Postgres-only `tag_aliases TEXT []` column, which SQLite ignored.
+-- Rebuild it keyed by (tag_guild_id, tag_name).
+CREATE TABLE tags_new (
+    tag_guild_id BIGINT NOT NULL REFERENCES guilds ON DELETE CASCADE,
+    tag_name VARCHAR(32) NOT NULL,
+    tag_content TEXT NOT NULL,
+    tag_author BIGINT NOT NULL,
+    tag_uses INT DEFAULT 0 NOT NULL,
+    tag_creation_date INT NOT NULL,
+    tag_aliases TEXT,
+    PRIMARY KEY (tag_guild_id, tag_name)
+);
+
+INSERT OR IGNORE INTO tags_new (tag_guild_id, tag_name, tag_content, tag_author, tag_uses, tag_creation_date, tag_aliases)
+SELECT tag_guild_id, tag_name, tag_content, tag_author, tag_uses, tag_creation_date, tag_aliases FROM tags
+WHERE tag_guild_id IS NOT NULL AND tag_name IS NOT NULL;
+
+DROP TABLE tags;
+
+ALTER TABLE tags_new RENAME TO tags;
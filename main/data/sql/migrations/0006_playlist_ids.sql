@@ -0,0 +1,71 @@
+-- Playlist and song IDs were allocated with SELECT ... ORDER BY id DESC and a separate INSERT,
+-- a full scan per insert that could hand out the same ID twice. They are AUTOINCREMENT keys now.
+CREATE TABLE playlists_new (
+    playlist_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id BIGINT NOT NULL,
+    playlist_name VARCHAR(32) NOT NULL
+);
+
+-- The first playlist with an ID keeps it
+INSERT INTO playlists_new (playlist_id, user_id, playlist_name)
+SELECT playlist_id, user_id, playlist_name
+FROM playlists AS p
+WHERE rowid = (SELECT MIN(rowid) FROM playlists WHERE playlist_id = p.playlist_id)
+ORDER BY playlist_id;
+
+-- Playlists that were handed an ID already in use get a new one, after the highest ID
+CREATE TEMP TABLE playlist_duplicates AS
+SELECT p.playlist_id AS old_id, p.user_id, p.playlist_name,
+    (SELECT COALESCE(MAX(playlist_id), 0) FROM playlists) + ROW_NUMBER() OVER (ORDER BY p.rowid) AS new_id
+FROM playlists AS p
+WHERE p.rowid != (SELECT MIN(rowid) FROM playlists WHERE playlist_id = p.playlist_id);
+
+INSERT INTO playlists_new (playlist_id, user_id, playlist_name)
+SELECT new_id, user_id, playlist_name FROM playlist_duplicates ORDER BY new_id;
+
+DROP TABLE playlists;
+
+ALTER TABLE playlists_new RENAME TO playlists;
+
+CREATE INDEX IF NOT EXISTS playlists_user_id_idx ON playlists (user_id);
+
+CREATE TABLE playlist_songs_new (
+    song_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    playlist_id INT NOT NULL,
+    playlist_song TEXT NOT NULL,
+    playlist_url TEXT NOT NULL,
+    track_encoded TEXT,
+    track_length INT,
+    track_author TEXT,
+    track_thumb TEXT
+);
+
+-- Songs keep their ID, unless it was the old -1 default or handed out twice
+INSERT INTO playlist_songs_new (song_id, playlist_id, playlist_song, playlist_url, track_encoded, track_length, track_author, track_thumb)
+SELECT song_id, playlist_id, playlist_song, playlist_url, track_encoded, track_length, track_author, track_thumb
+FROM playlist_songs AS s
+WHERE song_id > 0 AND rowid = (SELECT MIN(rowid) FROM playlist_songs WHERE song_id = s.song_id)
+ORDER BY song_id;
+
+INSERT INTO playlist_songs_new (playlist_id, playlist_song, playlist_url, track_encoded, track_length, track_author, track_thumb)
+SELECT playlist_id, playlist_song, playlist_url, track_encoded, track_length, track_author, track_thumb
+FROM playlist_songs AS s
+WHERE song_id <= 0 OR rowid != (SELECT MIN(rowid) FROM playlist_songs WHERE song_id = s.song_id)
+ORDER BY rowid;
+
+-- Songs only reference the playlist ID, so it's unknown which of the playlists sharing it they were added to.
+-- Every one of them showed all of these songs, a re-numbered playlist keeps a copy of them
+INSERT INTO playlist_songs_new (playlist_id, playlist_song, playlist_url, track_encoded, track_length, track_author, track_thumb)
+SELECT d.new_id, s.playlist_song, s.playlist_url, s.track_encoded, s.track_length, s.track_author, s.track_thumb
+FROM playlist_duplicates AS d
+JOIN playlist_songs AS s ON s.playlist_id = d.old_id
+ORDER BY d.new_id, s.rowid;
+
+DROP TABLE playlist_duplicates;
+
+DROP TABLE playlist_songs;
+
+ALTER TABLE playlist_songs_new RENAME TO playlist_songs;
+
+CREATE INDEX IF NOT EXISTS playlist_songs_playlist_id_idx ON playlist_songs (playlist_id);
+CREATE INDEX IF NOT EXISTS playlist_songs_url_idx ON playlist_songs (playlist_url) WHERE track_encoded IS NULL;
@@ -0,0 +1,9 @@
+-- `expires` holds whatever str(datetime) gave, with or without an offset or microseconds,
+-- so it doesn't compare as text. `expires_at` is the same instant in Unix seconds (naive values are UTC).
+ALTER TABLE timers ADD COLUMN expires_at INTEGER;
+
+UPDATE timers SET expires_at = CAST(strftime('%s', expires) AS INTEGER);
+
+DROP INDEX IF EXISTS timers_expires_idx;
+
+CREATE INDEX IF NOT EXISTS timers_expires_at_idx ON timers (expires_at);
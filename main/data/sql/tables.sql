@@ -18,38 +18,47 @@ CREATE TABLE "guild_config" (
     guild_id BIGINT REFERENCES guilds ON DELETE CASCADE,
     prefix VARCHAR DEFAULT 'g.',
     grole BIGINT,
-    premium BOOL DEFAULT 'FALSE', blacklisted BOOL DEFAULT "FALSE", 
+    premium BOOL DEFAULT 0, blacklisted BOOL DEFAULT 0,
     PRIMARY KEY (guild_id)
 )
 
 
 CREATE TABLE tags (
-    tag_guild_id BIGINT REFERENCES guilds ON DELETE CASCADE, 
-    tag_name VARCHAR(32),
+    tag_guild_id BIGINT NOT NULL REFERENCES guilds ON DELETE CASCADE,
+    tag_name VARCHAR(32) NOT NULL,
     tag_content TEXT NOT NULL,
     tag_author BIGINT NOT NULL,
     tag_uses INT DEFAULT 0 NOT NULL,
     tag_creation_date INT NOT NULL,
-    tag_aliases TEXT [],
-    UNIQUE(tag_guild_id, tag_name),
-    PRIMARY KEY(tag_guild_id, tag_name, tag_aliases)
+    tag_aliases TEXT,
+    PRIMARY KEY(tag_guild_id, tag_name)
 )
 
 CREATE TABLE users_data (
     user_id BIGINT,
     commands_ran BIGINT,
-    blacklisted BOOL DEFAULT "FALSE",
-    tips BOOL DEFAULT "FALSE",
-    premium BOOL DEFAULT "FALSE",
+    blacklisted BOOL DEFAULT 0,
+    tips BOOL DEFAULT 0,
+    premium BOOL DEFAULT 0,
+    mentions BOOL DEFAULT 0,
     PRIMARY KEY (user_id)
 )
 
+CREATE INDEX guild_config_blacklisted_idx ON guild_config (guild_id) WHERE blacklisted = 1
+CREATE INDEX guild_config_premium_idx ON guild_config (guild_id) WHERE premium = 1
+CREATE INDEX users_data_blacklisted_idx ON users_data (user_id) WHERE blacklisted = 1
+CREATE INDEX users_data_premium_idx ON users_data (user_id) WHERE premium = 1
+CREATE INDEX users_data_tips_idx ON users_data (user_id) WHERE tips = 1
+CREATE INDEX users_data_mentions_idx ON users_data (user_id) WHERE mentions = 1
+
 CREATE TABLE disabled_commands (
     snowflake_id BIGINT,
     command_name TEXT,
     PRIMARY KEY(snowflake_id, command_name)
 )
 
+CREATE INDEX disabled_commands_command_idx ON disabled_commands (command_name)
+
 CREATE TABLE "item_info" (
     item_id INTEGER PRIMARY KEY NOT NULL,
     item_price INTEGER NOT NULL,
@@ -59,23 +68,58 @@ CREATE TABLE "item_info" (
 )
 
 CREATE TABLE playlists (
+    playlist_id INTEGER PRIMARY KEY AUTOINCREMENT,
     user_id BIGINT NOT NULL,
-    playlist_name VARTEXT(32) NOT NULL,
-    playlist_id INT NOT NULL
+    playlist_name VARCHAR(32) NOT NULL
 )
 
 CREATE TABLE playlist_songs (
+    song_id INTEGER PRIMARY KEY AUTOINCREMENT,
     playlist_id INT NOT NULL,
     playlist_song TEXT NOT NULL,
     playlist_url TEXT NOT NULL,
-    song_id INT NOT NULL DEFAULT -1
+    track_encoded TEXT,
+    track_length INT,
+    track_author TEXT,
+    track_thumb TEXT
 )
 
+CREATE INDEX playlists_user_id_idx ON playlists (user_id)
+CREATE INDEX playlist_songs_playlist_id_idx ON playlist_songs (playlist_id)
+CREATE INDEX playlist_songs_url_idx ON playlist_songs (playlist_url) WHERE track_encoded IS NULL
+
 CREATE TABLE timers (
     id INTEGER PRIMARY KEY,
     expires TIMESTAMP NOT NULL,
     created TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     event TEXT NOT NULL,
     extra TEXT,
-    author BIGINT
-)
\ No newline at end of file
+    author BIGINT,
+    expires_at INTEGER
+)
+
+CREATE INDEX timers_expires_at_idx ON timers (expires_at)
+
+CREATE TABLE track_cache (
+    query TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    cached_at INTEGER NOT NULL
+)
+
+CREATE TABLE player_snapshots (
+    guild_id BIGINT PRIMARY KEY,
+    data TEXT NOT NULL,
+    saved_at INTEGER NOT NULL
+)
+
+CREATE INDEX track_cache_cached_at_idx ON track_cache (cached_at)
+
+CREATE TABLE cache_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    origin TEXT NOT NULL,
+    namespace TEXT NOT NULL,
+    key,
+    created_at INTEGER NOT NULL
+)
+
+CREATE INDEX cache_events_created_at_idx ON cache_events (created_at)
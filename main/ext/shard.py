@@ -361,6 +361,12 @@ def add_shard(self: commands.Cog, shard: Shard):
     cog_shards[shard.name] = shard
     self.__shards = cog_shards
 
+def unload_shards(self: commands.Cog):
+    """Default `cog_unload`, lets every shard stop its tasks before the cog gets replaced."""
+    for shard in getattr(self, '__shards', {}).values():
+        if hasattr(shard, 'shard_unload'):
+            shard.shard_unload()
+
 def remove_shard(self: commands.Cog, shard: Shard):
     shard._eject()
     del self.__shards[shard.name]
@@ -383,5 +389,6 @@ def override_discord():
     commands.group = shard_group
     commands.Cog.load_shard = load_shard
     commands.Cog.remove_shard = remove_shard
+    commands.Cog.cog_unload = unload_shards
     commands.Shard = Shard
     commands.Cog.add_shard = add_shard
\ No newline at end of file
@@ -0,0 +1,28 @@
+import sys
+import types
+
+
+def _stub_wavelink():
+    """
+    A stand-in for wavelink with just the names the utils modules reference, so their tests
+    also run where wavelink isn't installed. The tests only use fakes of their own for nodes and players.
+    """
+    wavelink = types.ModuleType("wavelink")
+    errors = types.ModuleType("wavelink.errors")
+
+    class NodeOccupied(Exception):
+        pass
+
+    errors.NodeOccupied = NodeOccupied
+    wavelink.errors = errors
+    for name in ("Client", "Node", "Track", "TrackPlaylist"):
+        setattr(wavelink, name, type(name, (), {}))
+
+    sys.modules["wavelink"] = wavelink
+    sys.modules["wavelink.errors"] = errors
+
+
+try:
+    import wavelink
+except ImportError:
+    _stub_wavelink()
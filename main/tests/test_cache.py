@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from utils import cache
+from utils.cache import CacheNamespace
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_lru_evicts_the_least_recently_used():
+    namespace = CacheNamespace("test", maxsize=3)
+    for key in "abc":
+        namespace[key] = key
+
+    namespace["a"]
+    namespace["d"] = "d"
+
+    assert list(namespace) == ["c", "a", "d"]
+    assert namespace.evictions == 1
+
+
+def test_lfu_evicts_the_least_frequently_used():
+    namespace = CacheNamespace("test", maxsize=3, policy=CacheNamespace.LFU)
+    for key in "abc":
+        namespace[key] = key
+    for key in "aab":
+        namespace[key]
+
+    namespace["d"] = "d"
+    assert "c" not in namespace
+
+    # Ties are broken by insertion order, "d" is now the only entry used once
+    namespace["e"] = "e"
+    assert sorted(namespace) == ["a", "b", "e"]
+
+
+def test_entries_expire_after_the_ttl(clock):
+    namespace = CacheNamespace("test", ttl=10)
+    namespace["a"] = 1
+
+    clock[0] += 9
+    assert namespace["a"] == 1
+
+    clock[0] += 1
+    assert "a" not in namespace
+    with pytest.raises(KeyError):
+        namespace["a"]
+    assert namespace.expirations == 1
+
+
+def test_expired_entries_are_purged_on_insert(clock):
+    namespace = CacheNamespace("test", ttl=10)
+    namespace["a"] = 1
+    namespace["b"] = 2
+
+    clock[0] += 10
+    namespace["c"] = 3
+
+    assert list(namespace) == ["c"]
+
+
+def test_load_reads_through_once():
+    calls = []
+
+    async def loader(key):
+        calls.append(key)
+        return key * 2
+
+    async def main():
+        namespace = CacheNamespace("test", loader=loader)
+        assert await namespace.load(2) == 4
+        assert await namespace.load(2) == 4
+
+    asyncio.run(main())
+    assert calls == [2]
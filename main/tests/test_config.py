@@ -0,0 +1,63 @@
+import configparser
+
+import pytest
+
+from utils.config import Settings
+
+
+INI = """
+[Other]
+password = youshallnotpass
+resolve_concurrency = 5
+
+[Node 1]
+host = 127.0.0.1
+port = 2333
+"""
+
+
+@pytest.fixture
+def path(tmp_path):
+    file = tmp_path / "config.ini"
+    file.write_text(INI)
+    return str(file)
+
+
+def test_environment_overrides_options(path):
+    settings = Settings.load(path, environ={
+        "GROOT_OTHER_PASSWORD": "secret",
+        "GROOT_NODE_1_HOST": "lavalink",
+        "GROOT_NODE_1_SECURE": "yes"
+    })
+
+    assert settings.get('Other', 'password') == "secret"
+    assert settings.getint('Other', 'resolve_concurrency') == 5
+    assert settings.get('Node 1', 'host') == "lavalink"
+    assert settings.getint('Node 1', 'port') == 2333
+    assert settings.getboolean('Node 1', 'secure') is True
+
+
+def test_environment_does_not_add_sections(path):
+    settings = Settings.load(path, environ={"GROOT_NODE_2_HOST": "lavalink", "GROOT_": "ignored"})
+
+    assert settings.sections() == ['Other', 'Node 1']
+    assert not settings.has_option('Node 1', '2_host')
+
+
+def test_fallbacks_and_errors(path):
+    settings = Settings.load(path, environ={})
+
+    assert settings.getint('Other', 'missing', fallback=3) == 3
+    assert settings.getfloat('Missing', 'missing', fallback=1.5) == 1.5
+    with pytest.raises(configparser.NoSectionError):
+        settings.get('Missing', 'missing')
+    with pytest.raises(configparser.NoOptionError):
+        settings.get('Other', 'missing')
+
+
+def test_settings_are_read_only(path):
+    settings = Settings.load(path, environ={})
+
+    with pytest.raises(TypeError):
+        settings['Other']['password'] = "changed"
+    assert settings.reload().get('Other', 'password') == "youshallnotpass"
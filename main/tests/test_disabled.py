@@ -0,0 +1,42 @@
+import types
+
+import pytest
+
+pytest.importorskip("discord")
+
+from utils.disabled import DisabledCommands
+
+
+def command(qualified_name, parent=None):
+    return types.SimpleNamespace(qualified_name=qualified_name, parent=parent)
+
+
+GROUP = command("tag")
+SUBCOMMAND = command("tag create", GROUP)
+
+
+def test_a_group_rule_applies_to_its_subcommands():
+    disabled = DisabledCommands([(10, "tag")])
+
+    assert disabled.is_disabled(GROUP, 10, 1)
+    assert disabled.is_disabled(SUBCOMMAND, 10, 1)
+    assert not disabled.is_disabled(SUBCOMMAND, 11, 1)
+
+
+def test_a_subcommand_rule_leaves_the_group_enabled():
+    disabled = DisabledCommands([(1, "tag create")])
+
+    assert disabled.is_disabled(SUBCOMMAND, 10, 1)
+    assert not disabled.is_disabled(GROUP, 10, 1)
+
+
+def test_replace_and_discard():
+    disabled = DisabledCommands([(1, "tag"), (2, "tag")])
+    assert len(disabled) == 2
+
+    disabled.replace("tag", [3])
+    assert ("tag", 3) in disabled and ("tag", 1) not in disabled
+
+    disabled.discard("tag", 3)
+    assert len(disabled) == 0
+    assert not disabled.is_disabled(GROUP, 3, 3)
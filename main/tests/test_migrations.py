@@ -0,0 +1,40 @@
+import os
+import sqlite3
+
+import pytest
+
+from utils.migrations import ADD_COLUMN, HOT_QUERIES, Migrator
+
+
+MIGRATIONS = os.path.join(os.path.dirname(__file__), os.pardir, "data", "sql", "migrations")
+
+
+@pytest.fixture(scope="module")
+def db():
+    """A fresh database with every migration applied, the way `Migrator.apply` does it."""
+    db = sqlite3.connect(":memory:")
+    for version, _, script in Migrator(db, MIGRATIONS).migrations():
+        for statement in Migrator.statements(script):
+            if (match := ADD_COLUMN.search(statement)) and match['column'].lower() in {
+                row[1].lower() for row in db.execute(f"PRAGMA table_info({match['table']})")
+            }:
+                continue
+            db.execute(statement)
+        db.execute(f"PRAGMA user_version = {version}")
+    yield db
+    db.close()
+
+
+def test_versions_are_unique():
+    versions = [version for version, _, _ in Migrator(None, MIGRATIONS).migrations()]
+    assert versions == sorted(set(versions))
+    assert versions[0] == 1
+
+
+@pytest.mark.parametrize("name", HOT_QUERIES)
+def test_hot_queries_use_indexes(db, name):
+    query = HOT_QUERIES[name]
+    plan = [row[-1] for row in db.execute(f"EXPLAIN QUERY PLAN {query}", (None,) * query.count("?"))]
+
+    assert plan
+    assert Migrator.full_scans(plan) == [], plan
@@ -0,0 +1,111 @@
+import asyncio
+import itertools
+import types
+
+import pytest
+
+from utils.config import Settings
+from utils.nodes import NodePool
+
+
+GUILD_IDS = itertools.count()
+
+
+class FakeNode:
+    """Stand-in for a Lavalink node, with what NodePool reads off wavelink.Node."""
+
+    def __init__(self, client, identifier, *, available=True, players=0, stats=None):
+        self.client = client
+        self.identifier = identifier
+        self.is_available = available
+        self.players = {guild_id: FakePlayer(guild_id, self) for guild_id in itertools.islice(GUILD_IDS, players)}
+        self.stats = stats
+        self.destroyed = False
+
+    async def destroy(self):
+        self.destroyed = True
+        del self.client.nodes[self.identifier]
+
+
+class FakePlayer:
+    def __init__(self, guild_id, node):
+        self.guild_id = guild_id
+        self.node = node
+
+    async def change_node(self, identifier):
+        target = self.node.client.nodes[identifier]
+        del self.node.players[self.guild_id]
+        target.players[self.guild_id] = self
+        self.node = target
+
+
+class FakeClient:
+    def __init__(self):
+        self.nodes = {}
+        self.initiated = []
+
+    async def initiate_node(self, **node):
+        self.initiated.append(node['identifier'])
+        self.nodes[node['identifier']] = FakeNode(self, node['identifier'])
+
+
+def stats(playing=0, load=0.0, deficit=-1, nulled=0):
+    return types.SimpleNamespace(playing_players=playing, system_load=load, frames_deficit=deficit, frames_nulled=nulled)
+
+
+@pytest.fixture
+def pool():
+    config = Settings({
+        'Other': {'password': 'youshallnotpass'},
+        'Node 1': {'host': 'one'},
+        'Node 2': {'host': 'two'},
+        'Node 3': {'host': 'three'}
+    })
+    bot = types.SimpleNamespace(config=config, wavelink=FakeClient(), logger=types.SimpleNamespace(warning=print))
+    pool = NodePool(bot)
+    pool.watch = lambda: asyncio.sleep(0)
+    bot.loop = types.SimpleNamespace(create_task=lambda coro: coro.close())
+    return pool
+
+
+def test_best_node_prefers_least_loaded_available(pool):
+    client = pool.client
+    client.nodes = {
+        'Node 1': FakeNode(client, 'Node 1', players=2, stats=stats(playing=2, load=0.1)),
+        'Node 2': FakeNode(client, 'Node 2', players=1, stats=stats(playing=1, load=0.9)),
+        'Node 3': FakeNode(client, 'Node 3', available=False)
+    }
+
+    assert pool.best_node().identifier == 'Node 1'
+    assert pool.best_node(exclude=client.nodes['Node 1']).identifier == 'Node 2'
+
+    client.nodes['Node 1'].is_available = client.nodes['Node 2'].is_available = False
+    assert pool.best_node() is None
+
+
+def test_connect_keeps_healthy_nodes(pool):
+    client = pool.client
+    healthy = client.nodes['Node 1'] = FakeNode(client, 'Node 1', players=3)
+    client.nodes['Node 2'] = FakeNode(client, 'Node 2', available=False)
+    client.nodes['Old'] = FakeNode(client, 'Old', players=2)
+
+    asyncio.run(pool.connect())
+
+    assert client.nodes['Node 1'] is healthy and not healthy.destroyed
+    assert sorted(client.initiated) == ['Node 2', 'Node 3']
+    assert 'Old' not in client.nodes
+    # The dropped node's players moved to a healthy node instead of being destroyed with it
+    assert sum(len(node.players) for node in client.nodes.values()) == 5
+
+
+def test_evacuate_moves_every_player(pool):
+    client = pool.client
+    failing = client.nodes['Node 1'] = FakeNode(client, 'Node 1', players=4)
+    client.nodes['Node 2'] = FakeNode(client, 'Node 2')
+    client.nodes['Node 3'] = FakeNode(client, 'Node 3', players=1)
+    failing.is_available = False
+
+    asyncio.run(pool.evacuate(failing))
+
+    assert not failing.players
+    assert len(client.nodes['Node 2'].players) + len(client.nodes['Node 3'].players) == 5
@@ -0,0 +1,65 @@
+import asyncio
+
+from utils.prefix import PrefixResolver
+
+
+class Reads:
+    def __init__(self, prefixes):
+        self.prefixes = prefixes
+        self.queries = 0
+
+    async def fetchone(self, query, params):
+        self.queries += 1
+        prefix = self.prefixes.get(params[0])
+        return None if prefix is None else (prefix,)
+
+
+class Bot:
+    def __init__(self, prefixes):
+        self.reads = Reads(prefixes)
+
+
+def test_misses_are_cached_as_the_default():
+    bot = Bot({1: "!"})
+    resolver = PrefixResolver(bot)
+
+    async def main():
+        assert await resolver.get(1) == "!"
+        assert await resolver.get(2) == PrefixResolver.DEFAULT
+        assert await resolver.get(1) == "!"
+        assert await resolver.get(2) == PrefixResolver.DEFAULT
+
+    asyncio.run(main())
+    assert bot.reads.queries == 2
+
+
+def test_loaded_resolver_never_queries():
+    bot = Bot({})
+    resolver = PrefixResolver(bot)
+    resolver.fill([(1, "?"), (2, PrefixResolver.DEFAULT), (3, None)])
+
+    async def main():
+        return [await resolver.get(guild) for guild in (1, 2, 3, 4)]
+
+    assert asyncio.run(main()) == ["?", "g.", "g.", "g."]
+    assert bot.reads.queries == 0
+
+
+def test_set_overrides_a_cached_default():
+    resolver = PrefixResolver(Bot({}))
+    resolver.fill([])
+
+    resolver.set(1, "$")
+    assert asyncio.run(resolver.get(1)) == "$"
+
+    resolver.set(1, PrefixResolver.DEFAULT)
+    assert asyncio.run(resolver.get(1)) == PrefixResolver.DEFAULT
+
+
+def test_match_is_case_insensitive_and_keeps_the_written_prefix():
+    resolver = PrefixResolver(Bot({}))
+
+    assert resolver.match("g.", "G.help") == "G."
+    assert resolver.match("g.", "g.help") == "g."
+    assert resolver.match("g.", "help") is None
+    assert resolver.match("groot ", "g") is None
@@ -0,0 +1,73 @@
+import asyncio
+import random
+
+import pytest
+
+from utils.queue import TrackQueue
+
+
+@pytest.fixture
+def items():
+    # Enough items to span several blocks, and split some of them
+    return list(range(TrackQueue.LOAD * 5 + 7))
+
+
+def test_indexing_matches_a_list(items):
+    queue = TrackQueue(items)
+
+    assert len(queue) == len(items)
+    assert list(queue) == items
+    for index in (0, 1, TrackQueue.LOAD - 1, TrackQueue.LOAD, len(items) - 1, -1, -len(items)):
+        assert queue[index] == items[index]
+    assert queue[10:TrackQueue.LOAD * 3] == items[10:TrackQueue.LOAD * 3]
+    assert queue[::2] == items[::2]
+
+    with pytest.raises(IndexError):
+        queue[len(items)]
+
+
+def test_removal_and_insertion_keep_the_order(items):
+    queue = TrackQueue(items)
+    expected = list(items)
+    rng = random.Random(0)
+
+    for _ in range(len(items)):
+        index = rng.randrange(len(expected))
+        if rng.random() < 0.3:
+            queue.insert(index, -index)
+            expected.insert(index, -index)
+        else:
+            assert queue.pop(index) == expected.pop(index)
+        assert len(queue) == len(expected)
+
+    assert list(queue) == expected
+    assert [queue[i] for i in range(len(expected))] == expected
+
+
+def test_move_and_delete():
+    queue = TrackQueue("abcde")
+
+    assert queue.move(0, 3) == "a"
+    assert list(queue) == list("bcdae")
+
+    del queue[-1]
+    assert list(queue) == list("bcda")
+
+
+def test_get_waits_for_an_item():
+    async def main():
+        queue = TrackQueue()
+        getter = asyncio.ensure_future(queue.get())
+        await asyncio.sleep(0)
+        assert not getter.done()
+
+        queue.put_nowait("track")
+        assert await asyncio.wait_for(getter, 1) == "track"
+        assert not queue
+
+    asyncio.run(main())
+
+
+def test_get_nowait_on_an_empty_queue():
+    with pytest.raises(asyncio.QueueEmpty):
+        TrackQueue().get_nowait()
@@ -0,0 +1,60 @@
+import pytest
+
+from utils import tracks
+from utils.tracks import CircuitBreaker, SourceHealth
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(tracks.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_opens_after_threshold_failures_within_the_window(clock):
+    breaker = CircuitBreaker(threshold=3, window=60, cooldown=300)
+
+    breaker.failure()
+    clock[0] += 61
+    breaker.failure()
+    breaker.failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_half_open_success_closes(clock):
+    breaker = CircuitBreaker(threshold=1, cooldown=300)
+    breaker.failure()
+
+    clock[0] += 300
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    breaker.success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_failure_opens_again(clock):
+    breaker = CircuitBreaker(threshold=3, cooldown=300)
+    for _ in range(3):
+        breaker.failure()
+
+    clock[0] += 300
+    breaker.failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    clock[0] += 299
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_source_health_tracks_sources_separately(clock):
+    health = SourceHealth(threshold=1)
+    youtube = SourceHealth.source_of("https://www.youtube.com/watch?v=x")
+
+    health.failure(youtube)
+
+    assert health.is_open(youtube)
+    assert not health.is_healthy(youtube)
+    assert health.is_healthy(SourceHealth.source_of("scsearch:song"))
+    assert health.fallback_search(youtube, "song") == "scsearch:song"
@@ -0,0 +1,79 @@
+import asyncio
+import logging
+import sqlite3
+
+import pytest
+
+from utils.writer import WriteBehind
+
+
+class Bot:
+    logger = logging.getLogger("tests.writer")
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = str(tmp_path / "writes.db")
+    with sqlite3.connect(path) as db:
+        db.execute("CREATE TABLE counters (name TEXT PRIMARY KEY, value INT NOT NULL)")
+    return path
+
+
+def rows(path):
+    with sqlite3.connect(path) as db:
+        return db.execute("SELECT name, value FROM counters ORDER BY name").fetchall()
+
+
+def run(coro):
+    return asyncio.run(asyncio.wait_for(coro, 10))
+
+
+def test_consecutive_statements_are_grouped():
+    insert, delete = "INSERT", "DELETE"
+    batch = [(insert, (1,)), (insert, (2,)), (delete, (1,)), (insert, (3,))]
+
+    assert WriteBehind._group(batch) == [(insert, [(1,), (2,)]), (delete, [(1,)]), (insert, [(3,)])]
+
+
+def test_flush_applies_the_batch(path):
+    writes = WriteBehind(Bot())
+
+    async def main():
+        await writes.open(path)
+        try:
+            writes.enqueue_many("INSERT INTO counters VALUES (?, ?)", [("a", 1), ("b", 2)])
+            writes.enqueue("UPDATE counters SET value = value + 1 WHERE name = ?", ("a",))
+            assert rows(path) == []
+            await writes.flush()
+        finally:
+            await writes.close()
+
+    run(main())
+    assert rows(path) == [("a", 2), ("b", 2)]
+    assert writes.statements == 3
+    assert not writes
+
+
+def test_a_broken_statement_is_dropped_alone(path):
+    writes = WriteBehind(Bot())
+
+    async def main():
+        await writes.open(path)
+        try:
+            writes.enqueue_many("INSERT INTO counters VALUES (?, ?)", [("a", 1), ("a", 2), ("b", 3)])
+            await writes.flush()
+        finally:
+            await writes.close()
+
+    run(main())
+    assert rows(path) == [("a", 1), ("b", 3)]
+    assert writes.failures == 1
+
+
+def test_a_full_batch_wakes_the_flush_loop():
+    writes = WriteBehind(Bot(), max_batch=2)
+
+    writes.enqueue("INSERT INTO counters VALUES (?, ?)", ("a", 1))
+    assert not writes._wakeup.is_set()
+    writes.enqueue("INSERT INTO counters VALUES (?, ?)", ("b", 1))
+    assert writes._wakeup.is_set()
@@ -0,0 +1,72 @@
+import asyncio
+import time
+import uuid
+
+from discord.utils import maybe_coroutine
+from typing import *
+from utils import queries
+
+
+class InvalidationBus:
+    """
+    Key-level cache invalidations shared by every process using the database.
+
+    `publish` applies an invalidation locally and appends it to the `cache_events` table,
+    which every other bot process polls, so a cache entry is refreshed precisely
+    wherever it lives instead of the whole cache being reloaded (or left stale).
+    Handlers are registered per namespace with `subscribe` and receive the invalidated key.
+    Only writes made through the bot publish events; anything else writing to the database
+    has to insert into `cache_events` itself.
+    """
+
+    def __init__(self, bot, *, interval: float = 5, retention: int = 3600):
+        self.bot = bot
+        self.interval = interval
+        self.retention = retention
+        self.origin = uuid.uuid4().hex
+        self._handlers: Dict[str, List[Callable]] = {}
+        self._last_id = 0
+        self._last_prune = 0
+        self._task = None
+
+    def subscribe(self, namespace: str, handler: Callable):
+        """Registers `handler(key)`, sync or async, for invalidations of a namespace."""
+        self._handlers.setdefault(namespace, []).append(handler)
+
+    async def apply(self, namespace: str, key):
+        for handler in self._handlers.get(namespace, ()):
+            try:
+                await maybe_coroutine(handler, key)
+            except Exception as e:
+                self.bot.logger.warning(f"Could not invalidate {namespace}[{key!r}]: {e}")
+
+    async def publish(self, namespace: str, key):
+        """Invalidates a key here and in every other process."""
+        await self.apply(namespace, key)
+
+        query = "INSERT INTO cache_events (origin, namespace, key, created_at) VALUES (?, ?, ?, ?)"
+        await self.bot.db.execute(query, (self.origin, namespace, key, int(time.time())))
+
+    async def start(self):
+        cur = await self.bot.db.execute("SELECT COALESCE(MAX(id), 0) FROM cache_events")
+        self._last_id, = await cur.fetchone()
+
+        if self._task is None or self._task.done():
+            self._task = self.bot.loop.create_task(self.poll())
+
+    def close(self):
+        if self._task is not None:
+            self._task.cancel()
+
+    async def poll(self):
+        while not self.bot.is_closed():
+            await asyncio.sleep(self.interval)
+            rows = await self.bot.reads.fetchall(queries.CACHE_EVENTS, (self._last_id,))
+            for event_id, origin, namespace, key in rows:
+                self._last_id = event_id
+                if origin != self.origin:
+                    await self.apply(namespace, key)
+
+            if time.time() - self._last_prune >= self.retention:
+                self._last_prune = time.time()
+                await self.bot.db.execute("DELETE FROM cache_events WHERE created_at < ?", (int(self._last_prune) - self.retention,))
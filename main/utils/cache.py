@@ -1,4 +1,192 @@
+import inspect
+import time
+
+from collections import OrderedDict, defaultdict
+from collections.abc import MutableMapping
 from datetime import datetime
+from typing import *
+
+
+class CacheNamespace(MutableMapping):
+    """
+    A single named cache, bounded by `maxsize` entries and/or a `ttl` in seconds.
+    When full, the least recently used (LRU) or least frequently used (LFU) entry is evicted.
+    An optional `loader(key)`, sync or async, is used by `load` to read through on misses.
+    """
+
+    LRU = 'lru'
+    LFU = 'lfu'
+
+    def __init__(self, name: str, *, maxsize: int = None, ttl: float = None, policy: str = LRU, loader: Callable = None):
+        if policy not in (self.LRU, self.LFU):
+            raise ValueError(f"Unknown eviction policy {policy!r}")
+
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.policy = policy
+        self.loader = loader
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        # key -> (value, expires_at); ordered by recency for LRU
+        self._data: OrderedDict = OrderedDict()
+        # LFU bookkeeping: key -> frequency, frequency -> keys in insertion order
+        self._counts: Dict[Hashable, int] = {}
+        self._buckets: DefaultDict[int, OrderedDict] = defaultdict(OrderedDict)
+        self._min_count = 0
+        self._last_purge = time.monotonic()
+
+    # Policy helpers
+    def _touch(self, key):
+        if self.policy == self.LRU:
+            self._data.move_to_end(key)
+            return
+
+        count = self._counts[key]
+        bucket = self._buckets[count]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[count]
+            if self._min_count == count:
+                self._min_count = count + 1
+        self._counts[key] = count + 1
+        self._buckets[count + 1][key] = None
+
+    def _track(self, key):
+        if self.policy == self.LFU:
+            self._counts[key] = 1
+            self._buckets[1][key] = None
+            self._min_count = 1
+
+    def _untrack(self, key):
+        if self.policy == self.LFU:
+            count = self._counts.pop(key)
+            bucket = self._buckets[count]
+            del bucket[key]
+            if not bucket:
+                del self._buckets[count]
+
+    def _victim(self):
+        if self.policy == self.LRU:
+            return next(iter(self._data))
+
+        if self._min_count not in self._buckets:
+            self._min_count = min(self._buckets)
+        return next(iter(self._buckets[self._min_count]))
+
+    def _expired(self, entry: tuple) -> bool:
+        return entry[1] is not None and entry[1] <= time.monotonic()
+
+    def _remove(self, key):
+        del self._data[key]
+        self._untrack(key)
+
+    def purge(self):
+        """Drops every expired entry."""
+        self._last_purge = time.monotonic()
+        if self.ttl is None:
+            return
+
+        for key in [key for key, entry in self._data.items() if self._expired(entry)]:
+            self._remove(key)
+            self.expirations += 1
+
+    # Mapping API
+    def __getitem__(self, key):
+        try:
+            entry = self._data[key]
+        except KeyError:
+            self.misses += 1
+            raise
+
+        if self._expired(entry):
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            raise KeyError(key)
+
+        self.hits += 1
+        self._touch(key)
+        return entry[0]
+
+    def __setitem__(self, key, value):
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        if key in self._data:
+            self._data[key] = (value, expires_at)
+            self._touch(key)
+            return
+
+        if self.ttl is not None and time.monotonic() - self._last_purge >= self.ttl:
+            self.purge()
+
+        if self.maxsize is not None:
+            while self._data and len(self._data) >= self.maxsize:
+                self._remove(self._victim())
+                self.evictions += 1
+
+        self._data[key] = (value, expires_at)
+        self._track(key)
+
+    def __delitem__(self, key):
+        self._remove(key)
+
+    def __contains__(self, key):
+        """Membership checks neither count as a hit nor refresh the entry."""
+        entry = self._data.get(key)
+        return entry is not None and not self._expired(entry)
+
+    def __iter__(self):
+        return iter(list(self._data))
+
+    def __len__(self):
+        return len(self._data)
+
+    def __repr__(self):
+        return f"<CacheNamespace name={self.name!r} size={len(self)} policy={self.policy}>"
+
+    def clear(self):
+        self._data.clear()
+        self._counts.clear()
+        self._buckets.clear()
+        self._min_count = 0
+
+    async def load(self, key, default=None):
+        """Returns the cached value, falling back to the loader (and caching its result) on a miss."""
+        try:
+            return self[key]
+        except KeyError:
+            pass
+
+        if self.loader is None:
+            return default
+
+        value = self.loader(key)
+        if inspect.isawaitable(value):
+            value = await value
+        if value is None:
+            return default
+
+        self[key] = value
+        return value
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self),
+            "maxsize": self.maxsize,
+            "policy": self.policy,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
+
 
 class CacheManager(dict):
 
@@ -15,12 +203,22 @@ class CacheManager(dict):
         template = f"[{now}] {message}\n"
         return template
 
+    def namespace(self, name: str, **options) -> CacheNamespace:
+        """Creates (or replaces) a bounded namespace, see `CacheNamespace` for the options."""
+        namespace = CacheNamespace(name, **options)
+        super().__setitem__(name, namespace)
+        return namespace
+
+    def stats(self) -> Dict[str, dict]:
+        """Hit, miss and eviction counters for every namespace."""
+        return {name: value.stats for name, value in self.items() if isinstance(value, CacheNamespace)}
+
 
     def __setitem__(self, key, value):
         return super().__setitem__(key, value)
-    
+
     def __getitem__(self, key):
         return super().__getitem__(key)
 
     def get(self, key, default=None):
-        return super().get(key, default)
\ No newline at end of file
+        return super().get(key, default)
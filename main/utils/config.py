@@ -0,0 +1,106 @@
+import configparser
+import os
+import re
+
+from types import MappingProxyType
+from typing import *
+
+
+_MISSING = object()
+
+
+class Settings:
+    """
+    Read-only snapshot of config.ini, parsed once.
+
+    Any option of a section in config.ini can be overridden with an environment variable named
+    GROOT_<SECTION>_<OPTION>, e.g. GROOT_OTHER_PASSWORD, or GROOT_NODE_1_HOST for [Node 1].
+    Sections can't be added that way, the name of one can't be told back from its variable.
+    The accessors mirror `configparser.ConfigParser`, so it can be used in its place.
+    """
+
+    BOOLEAN_STATES = configparser.ConfigParser.BOOLEAN_STATES
+
+    def __init__(self, sections: Mapping[str, Mapping[str, str]], *, path: str = None):
+        self.path = path
+        self._sections = MappingProxyType({
+            name: MappingProxyType({option.lower(): value for option, value in options.items()})
+            for name, options in sections.items()
+        })
+
+    @staticmethod
+    def env_prefix(section: str) -> str:
+        return "GROOT_" + re.sub(r"[^A-Z0-9]+", "_", section.upper()) + "_"
+
+    @classmethod
+    def load(cls, path: str, *, environ: Mapping[str, str] = None) -> "Settings":
+        parser = configparser.ConfigParser()
+        parser.read(path)
+        environ = os.environ if environ is None else environ
+
+        sections = {}
+        for section in parser.sections():
+            options = dict(parser.items(section))
+            prefix = cls.env_prefix(section)
+            for key, value in environ.items():
+                if key.startswith(prefix) and len(key) > len(prefix):
+                    options[key[len(prefix):].lower()] = value
+            sections[section] = options
+        return cls(sections, path=path)
+
+    def reload(self) -> "Settings":
+        """Returns a freshly read copy, leaving this one untouched."""
+        return self.load(self.path)
+
+    def __getitem__(self, section: str) -> Mapping[str, str]:
+        return self._sections[section]
+
+    def __contains__(self, section: str) -> bool:
+        return section in self._sections
+
+    def __repr__(self):
+        return f"<Settings path={self.path!r} sections={list(self._sections)}>"
+
+    def sections(self) -> List[str]:
+        return list(self._sections)
+
+    def has_section(self, section: str) -> bool:
+        return section in self._sections
+
+    def has_option(self, section: str, option: str) -> bool:
+        return section in self._sections and option.lower() in self._sections[section]
+
+    def get(self, section: str, option: str, *, fallback=_MISSING) -> str:
+        try:
+            options = self._sections[section]
+        except KeyError:
+            if fallback is _MISSING:
+                raise configparser.NoSectionError(section) from None
+            return fallback
+
+        try:
+            return options[option.lower()]
+        except KeyError:
+            if fallback is _MISSING:
+                raise configparser.NoOptionError(option, section) from None
+            return fallback
+
+    def _convert(self, converter: Callable, section: str, option: str, fallback):
+        value = self.get(section, option, fallback=_MISSING if fallback is _MISSING else None)
+        if value is None:
+            return fallback
+        return converter(value)
+
+    def getint(self, section: str, option: str, *, fallback=_MISSING) -> int:
+        return self._convert(int, section, option, fallback)
+
+    def getfloat(self, section: str, option: str, *, fallback=_MISSING) -> float:
+        return self._convert(float, section, option, fallback)
+
+    def getboolean(self, section: str, option: str, *, fallback=_MISSING) -> bool:
+        def to_boolean(value: str) -> bool:
+            try:
+                return self.BOOLEAN_STATES[value.lower()]
+            except KeyError:
+                raise ValueError(f"Not a boolean: {value}") from None
+        return self._convert(to_boolean, section, option, fallback)
@@ -0,0 +1,82 @@
+import asyncio
+import aiosqlite
+
+from contextlib import asynccontextmanager
+from typing import *
+
+
+PRAGMAS = {
+    "journal_mode": "wal",
+    "synchronous": "normal",
+    "cache_size": -16000,
+    "mmap_size": 256 * 1024 * 1024,
+    "temp_store": "memory",
+    "busy_timeout": 5000
+}
+
+
+async def apply_pragmas(db: aiosqlite.Connection, pragmas: Mapping[str, Any]):
+    for name, value in pragmas.items():
+        await db.execute(f"PRAGMA {name} = {value}")
+
+
+async def connect_writer(path: str, **pragmas) -> aiosqlite.Connection:
+    """
+    Opens a writer connection. There are two: `bot.db` for the direct writes of commands,
+    and the one `WriteBehind` owns for its batches, so a batch's transaction never takes in a
+    direct write. SQLite serialises them, `busy_timeout` makes either wait for the other.
+    Both are in autocommit mode, so a write is durable (and visible to the readers) right away;
+    batches open their own transaction with BEGIN IMMEDIATE.
+    """
+    db = await aiosqlite.connect(path, isolation_level=None)
+    await apply_pragmas(db, {**PRAGMAS, **pragmas})
+    return db
+
+
+class ReadPool:
+    """
+    A few read-only connections for queries that should not wait behind writes.
+    With WAL, readers see the last committed state without blocking (or being blocked by) the writer.
+    """
+
+    def __init__(self, path: str, *, size: int = 4):
+        self.path = path
+        self.size = size
+        self._idle: asyncio.Queue = asyncio.Queue()
+        self._connections: List[aiosqlite.Connection] = []
+
+    async def open(self):
+        for _ in range(self.size):
+            db = await aiosqlite.connect(f"file:{self.path}?mode=ro", uri=True)
+            await apply_pragmas(db, {
+                "query_only": 1,
+                "cache_size": PRAGMAS["cache_size"],
+                "mmap_size": PRAGMAS["mmap_size"],
+                "temp_store": PRAGMAS["temp_store"],
+                "busy_timeout": PRAGMAS["busy_timeout"]
+            })
+            self._connections.append(db)
+            self._idle.put_nowait(db)
+
+    async def close(self):
+        for db in self._connections:
+            await db.close()
+        self._connections.clear()
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[aiosqlite.Connection]:
+        db = await self._idle.get()
+        try:
+            yield db
+        finally:
+            self._idle.put_nowait(db)
+
+    async def fetchone(self, query: str, params: Iterable = ()) -> Optional[tuple]:
+        async with self.acquire() as db:
+            cur = await db.execute(query, tuple(params))
+            return await cur.fetchone()
+
+    async def fetchall(self, query: str, params: Iterable = ()) -> List[tuple]:
+        async with self.acquire() as db:
+            cur = await db.execute(query, tuple(params))
+            return await cur.fetchall()
@@ -0,0 +1,45 @@
+from discord.ext import commands
+from typing import *
+
+
+class DisabledCommands:
+    """
+    Index of where commands are disabled, keyed by the command's qualified name and the channel/guild ID.
+    A rule on a group applies to all of its subcommands.
+    """
+
+    def __init__(self, rows: Iterable[Tuple[int, str]] = ()):
+        self._rules: Dict[str, Set[int]] = {}
+        for snowflake_id, command_name in rows:
+            self.add(command_name, snowflake_id)
+
+    def __contains__(self, rule: Tuple[str, int]) -> bool:
+        command_name, snowflake_id = rule
+        return snowflake_id in self._rules.get(command_name, ())
+
+    def __len__(self):
+        return sum(map(len, self._rules.values()))
+
+    def add(self, command_name: str, snowflake_id: int):
+        self._rules.setdefault(command_name, set()).add(snowflake_id)
+
+    def discard(self, command_name: str, snowflake_id: int):
+        if (snowflakes := self._rules.get(command_name)) is not None:
+            snowflakes.discard(snowflake_id)
+            if not snowflakes:
+                del self._rules[command_name]
+
+    def replace(self, command_name: str, snowflake_ids: Iterable[int]):
+        """Replaces every rule of a single command."""
+        if snowflakes := set(snowflake_ids):
+            self._rules[command_name] = snowflakes
+        else:
+            self._rules.pop(command_name, None)
+
+    def is_disabled(self, command: commands.Command, channel_id: Optional[int], guild_id: Optional[int]) -> bool:
+        while command is not None:
+            if (snowflakes := self._rules.get(command.qualified_name)) is not None:
+                if channel_id in snowflakes or guild_id in snowflakes:
+                    return True
+            command = command.parent
+        return False
@@ -0,0 +1,115 @@
+import json
+import logging
+import os
+import queue
+
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import *
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, for log shippers."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "time": self.formatTime(record, self.datefmt),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        if record.exc_info:
+            payload["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload["exception"] = record.exc_text
+        return json.dumps(payload, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps only every `rate`-th record below `level` from each logging call site.
+    Records at or above `level` are never dropped.
+    Call sites are told apart by where they are, messages are mostly f-strings and never repeat.
+    """
+
+    def __init__(self, rate: int, *, level: int = logging.WARNING):
+        super().__init__()
+        self.rate = max(rate, 1)
+        self.level = level
+        self._seen: Dict[Tuple[str, Any], int] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.rate == 1 or record.levelno >= self.level:
+            return True
+
+        key = (record.name, record.levelno, record.pathname, record.lineno)
+        count = self._seen.get(key, 0)
+        self._seen[key] = count + 1
+        if len(self._seen) > 4096:
+            self._seen.clear()
+        return count % self.rate == 0
+
+
+class _QueueHandler(QueueHandler):
+    """Leaves formatting (and tracebacks) to the listener thread, the queue never leaves the process."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class LogPipeline:
+    """
+    Routes log records through a queue to rotating files written by a background thread,
+    so a slow disk never blocks the event loop.
+    Call `attach` for every logger, then `start`; `stop` flushes whatever is left.
+    """
+
+    def __init__(self, directory: str, *, max_bytes: int = 5 * 1024 * 1024, backup_count: int = 5,
+                 structured: bool = False, sample_rate: int = 1):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.structured = structured
+        self.sample_rate = sample_rate
+
+        self.queue = queue.SimpleQueue()
+        self._handlers: List[logging.Handler] = []
+        self._listener: Optional[QueueListener] = None
+
+    def formatter(self) -> logging.Formatter:
+        if self.structured:
+            return JsonFormatter(datefmt="%d-%b-%y %H:%M:%S")
+        return logging.Formatter(
+            fmt='[{asctime}] {levelname:<10} | {name:<10}: {message}',
+            datefmt="%d-%b-%y %H:%M:%S",
+            style="{",
+        )
+
+    def attach(self, logger: logging.Logger, filename: str, *, level: int = logging.DEBUG) -> logging.Logger:
+        """Sends a logger's records to `filename` in the pipeline's directory."""
+        handler = RotatingFileHandler(
+            os.path.join(self.directory, filename),
+            maxBytes=self.max_bytes,
+            backupCount=self.backup_count,
+            encoding='utf-8',
+            delay=True
+        )
+        handler.setFormatter(self.formatter())
+        handler.addFilter(logging.Filter(logger.name))
+        self._handlers.append(handler)
+
+        queue_handler = _QueueHandler(self.queue)
+        queue_handler.addFilter(SamplingFilter(self.sample_rate))
+        logger.setLevel(level)
+        logger.addHandler(queue_handler)
+        return logger
+
+    def start(self):
+        self._listener = QueueListener(self.queue, *self._handlers, respect_handler_level=True)
+        self._listener.start()
+
+    def stop(self):
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
@@ -0,0 +1,80 @@
+import bisect
+import time
+
+from typing import *
+from collections import Counter
+
+
+# Upper bounds (ms) of the latency histogram buckets, the last bucket takes everything slower
+LATENCY_BUCKETS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class UsageAggregator:
+    """
+    Counts command usage in memory and writes it out in bulk.
+
+    `flush` queues one `executemany` per table on the write-behind queue, so both tables
+    are updated in the same transaction. Users are keyed by their integer ID; commands by name,
+    which is what the `usage` table is keyed by.
+    Besides the counters, a latency histogram is kept for every command since startup.
+    """
+
+    USERS_QUERY = """
+                  INSERT INTO users_data (user_id, commands_ran)
+                  VALUES (?, ?)
+                  ON CONFLICT(user_id) DO UPDATE SET commands_ran = commands_ran + excluded.commands_ran
+                  """
+    COMMANDS_QUERY = """
+                     INSERT INTO usage (command, counter)
+                     VALUES (?, ?)
+                     ON CONFLICT(command) DO UPDATE SET counter = counter + excluded.counter
+                     """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.users: Counter[int] = Counter()
+        self.commands: Counter[str] = Counter()
+        self.latencies: Dict[str, List[int]] = {}
+        self.flushed = 0
+        self._started: Dict[int, float] = {}
+
+    def __len__(self):
+        return len(self.users) + len(self.commands)
+
+    def started(self, ctx):
+        self.users[ctx.author.id] += 1
+        self.commands[ctx.command.name] += 1
+        self._started[ctx.message.id] = time.perf_counter()
+
+    def finished(self, ctx):
+        if (started := self._started.pop(ctx.message.id, None)) is None or ctx.command is None:
+            return
+
+        elapsed = (time.perf_counter() - started) * 1000
+        histogram = self.latencies.setdefault(ctx.command.qualified_name, [0] * (len(LATENCY_BUCKETS) + 1))
+        histogram[bisect.bisect_left(LATENCY_BUCKETS, elapsed)] += 1
+
+    def flush(self):
+        """Queues the counters gathered since the last flush and resets them."""
+        users, self.users = self.users, Counter()
+        commands, self.commands = self.commands, Counter()
+
+        self.bot.writes.enqueue_many(self.USERS_QUERY, users.items())
+        self.bot.writes.enqueue_many(self.COMMANDS_QUERY, commands.items())
+        self.flushed += len(users) + len(commands)
+
+    @staticmethod
+    def bucket_names() -> List[str]:
+        return [f"<={bound}ms" for bound in LATENCY_BUCKETS] + [f">{LATENCY_BUCKETS[-1]}ms"]
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        names = self.bucket_names()
+        return {
+            "pending": len(self),
+            "flushed": self.flushed,
+            "latency": {
+                command: {name: count for name, count in zip(names, histogram) if count}
+                for command, histogram in sorted(self.latencies.items())
+            }
+        }
@@ -0,0 +1,103 @@
+import os
+import re
+import sqlite3
+
+from typing import *
+from utils import queries
+
+
+ADD_COLUMN = re.compile(r"ALTER\s+TABLE\s+(?P<table>\w+)\s+ADD\s+(?:COLUMN\s+)?(?P<column>\w+)", re.IGNORECASE)
+MIGRATION_FILE = re.compile(r"(?P<version>\d+)_(?P<name>\w+)\.sql")
+
+# The queries run on (almost) every command, `dev queryplan` checks none of them scans a table
+HOT_QUERIES = {
+    "prefix": queries.PREFIX,
+    "tag": queries.TAG,
+    "tag owner": queries.TAG_OWNER,
+    "disabled commands": queries.DISABLED_COMMAND,
+    "playlists": queries.USER_PLAYLISTS,
+    "playlist": queries.PLAYLIST,
+    "playlist owner": queries.PLAYLIST_OWNER,
+    "remove songs": queries.REMOVE_SONGS.format(queries.placeholders(3)),
+    "backfill songs": queries.BACKFILL_SONGS,
+    "due timers": queries.DUE_TIMERS,
+    "delete timers": queries.DELETE_TIMERS.format(queries.placeholders(3)),
+    "track cache": queries.TRACK_CACHE,
+    "cache events": queries.CACHE_EVENTS,
+}
+
+
+class Migrator:
+    """
+    Applies the numbered migrations in data/sql/migrations (`0001_baseline.sql`, ...) that are newer
+    than the database's `user_version`, each in its own transaction.
+    `ALTER TABLE ... ADD COLUMN` is skipped when the column is already there, so migrations can
+    take over columns that used to be added on the fly.
+    """
+
+    def __init__(self, db, directory: str):
+        self.db = db
+        self.directory = directory
+
+    def migrations(self) -> List[Tuple[int, str, str]]:
+        found = []
+        for file in os.listdir(self.directory):
+            if (match := MIGRATION_FILE.fullmatch(file)) is None:
+                continue
+            with open(os.path.join(self.directory, file), encoding='utf-8') as f:
+                found.append((int(match['version']), match['name'], f.read()))
+        return sorted(found)
+
+    @staticmethod
+    def statements(script: str) -> Iterator[str]:
+        buffer = ""
+        for line in script.splitlines(keepends=True):
+            buffer += line
+            if sqlite3.complete_statement(buffer):
+                if statement := buffer.strip():
+                    yield statement
+                buffer = ""
+
+    async def version(self) -> int:
+        cur = await self.db.execute("PRAGMA user_version")
+        return (await cur.fetchone())[0]
+
+    async def columns(self, table: str) -> Set[str]:
+        cur = await self.db.execute(f"PRAGMA table_info({table})")
+        return {row[1].lower() for row in await cur.fetchall()}
+
+    async def apply(self, version: int, script: str):
+        await self.db.execute("BEGIN")
+        try:
+            for statement in self.statements(script):
+                if (match := ADD_COLUMN.search(statement)) and match['column'].lower() in await self.columns(match['table']):
+                    continue
+                await self.db.execute(statement)
+            await self.db.execute(f"PRAGMA user_version = {version}")
+            await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            raise
+
+    async def run(self) -> List[str]:
+        """Applies every pending migration, returning their names."""
+        current = await self.version()
+        applied = []
+        for version, name, script in self.migrations():
+            if version <= current:
+                continue
+            await self.apply(version, script)
+            applied.append(f"{version:04}_{name}")
+        return applied
+
+    async def query_plans(self, queries: Mapping[str, str] = None) -> Dict[str, List[str]]:
+        """`EXPLAIN QUERY PLAN` of every query, with NULL for each parameter."""
+        plans = {}
+        for name, query in (queries or HOT_QUERIES).items():
+            cur = await self.db.execute(f"EXPLAIN QUERY PLAN {query}", (None,) * query.count("?"))
+            plans[name] = [row[-1] for row in await cur.fetchall()]
+        return plans
+
+    @staticmethod
+    def full_scans(plan: List[str]) -> List[str]:
+        return [step for step in plan if step.startswith("SCAN") and " USING " not in step]
@@ -0,0 +1,144 @@
+import asyncio
+import wavelink
+
+from typing import *
+
+
+class NodePool:
+    """
+    Keeps every Lavalink node listed in config.ini connected and hands out the least loaded one.
+
+    Nodes are read from the sections whose name starts with `Node`, e.g.
+    [Node 1]
+    host = 127.0.0.1
+    port = 2333
+    password = youshallnotpass
+    region = us_central
+
+    Without any node section, the single local node at 127.0.0.1:2333 is used.
+    """
+
+    def __init__(self, bot, *, interval: float = 10):
+        self.bot = bot
+        self.interval = interval
+        self._task = None
+
+    @property
+    def client(self) -> wavelink.Client:
+        return self.bot.wavelink
+
+    def configured(self) -> List[dict]:
+        config = self.bot.config
+        nodes = []
+        for section in config.sections():
+            if not section.startswith('Node'):
+                continue
+
+            host = config.get(section, 'host', fallback='127.0.0.1')
+            port = config.getint(section, 'port', fallback=2333)
+            secure = config.getboolean(section, 'secure', fallback=False)
+            nodes.append({
+                'host': host,
+                'port': port,
+                'rest_uri': f"{'https' if secure else 'http'}://{host}:{port}",
+                'password': config.get(section, 'password', fallback=config.get('Other', 'password')),
+                'identifier': section,
+                'region': config.get(section, 'region', fallback='us_central'),
+                'secure': secure
+            })
+
+        if not nodes:
+            nodes.append({
+                'host': '127.0.0.1',
+                'port': 2333,
+                'rest_uri': 'http://127.0.0.1:2333',
+                'password': config.get('Other', 'password'),
+                'identifier': 'Node 1',
+                'region': 'us_central',
+                'secure': False
+            })
+        return nodes
+
+    async def _initiate(self, node: dict):
+        try:
+            await self.client.initiate_node(**node)
+        except wavelink.errors.NodeOccupied:
+            pass
+        except Exception as e:
+            self.bot.logger.warning(f"Could not connect to Lavalink node {node['identifier']}: {e}")
+
+    async def connect(self):
+        """
+        Connects the configured nodes that are missing or unavailable and starts watching their health.
+        Healthy nodes, and their players, are left alone; nodes no longer configured are dropped
+        once their players are moved elsewhere.
+        """
+        configured = {node['identifier']: node for node in self.configured()}
+        for identifier, node in list(self.client.nodes.items()):
+            if identifier in configured and node.is_available:
+                continue
+            if node.players:
+                await self.evacuate(node)
+            await node.destroy()
+
+        await asyncio.gather(*(
+            self._initiate(node) for identifier, node in configured.items() if identifier not in self.client.nodes
+        ))
+
+        if self._task is None or self._task.done():
+            self._task = self.bot.loop.create_task(self.watch())
+
+    def close(self):
+        if self._task is not None:
+            self._task.cancel()
+
+    @staticmethod
+    def load(node: wavelink.Node) -> float:
+        """Lavalink's penalty formula, using the local player count since stats only arrive every minute."""
+        players = len(node.players)
+        stats = node.stats
+        if stats is None:
+            return players
+
+        penalty = max(players, stats.playing_players)
+        penalty += 1.05 ** (100 * stats.system_load) * 10 - 10
+        if stats.frames_deficit != -1:
+            penalty += 1.03 ** (500 * (stats.frames_deficit / 3000)) * 600 - 600
+            penalty += (1.03 ** (500 * (stats.frames_nulled / 3000)) * 300 - 300) * 2
+        return penalty
+
+    def best_node(self, *, exclude: wavelink.Node = None) -> Optional[wavelink.Node]:
+        nodes = [node for node in self.client.nodes.values() if node.is_available and node is not exclude]
+        if not nodes:
+            return None
+        return min(nodes, key=self.load)
+
+    def stats(self) -> Dict[str, dict]:
+        return {
+            identifier: {
+                'available': node.is_available,
+                'players': len(node.players),
+                'cpu': getattr(node.stats, 'system_load', None),
+                'deficit': getattr(node.stats, 'frames_deficit', None),
+                'load': self.load(node)
+            }
+            for identifier, node in self.client.nodes.items()
+        }
+
+    async def evacuate(self, node: wavelink.Node):
+        """Moves every player of a node onto the least loaded healthy node."""
+        for player in list(node.players.values()):
+            target = self.best_node(exclude=node)
+            if target is None:
+                return
+            try:
+                await player.change_node(target.identifier)
+            except Exception as e:
+                self.bot.logger.warning(f"Could not move player {player.guild_id} to {target.identifier}: {e}")
+
+    async def watch(self):
+        while not self.bot.is_closed():
+            await asyncio.sleep(self.interval)
+            for node in list(self.client.nodes.values()):
+                if not node.is_available and node.players:
+                    await self.evacuate(node)
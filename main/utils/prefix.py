@@ -0,0 +1,69 @@
+from typing import *
+from utils import queries
+
+
+class PrefixResolver:
+    """
+    Resolves the prefix for every incoming message.
+    Custom prefixes are bulk loaded once, guilds using the default prefix are cached as such,
+    and matching is a case-insensitive startswith against a pre-lowered prefix.
+    """
+
+    DEFAULT = "g."
+
+    def __init__(self, bot):
+        self.bot = bot
+        self._custom: Dict[int, str] = {}
+        self._defaults: Set[int] = set()
+        self._lowered: Dict[str, str] = {}
+        self._loaded = False
+
+    async def load(self):
+        """Loads every custom prefix, after which misses no longer need a query."""
+        query = "SELECT guild_id, prefix FROM guild_config WHERE prefix IS NOT NULL AND prefix != ?"
+        self.fill(await self.bot.reads.fetchall(query, (self.DEFAULT,)))
+
+    def fill(self, rows: Iterable[Tuple[int, str]]):
+        """Replaces the custom prefixes with already fetched (guild_id, prefix) rows."""
+        self._custom = {guild_id: prefix for guild_id, prefix in rows if prefix and prefix != self.DEFAULT}
+        self._defaults.clear()
+        self._loaded = True
+
+    async def get(self, snowflake_id: int) -> str:
+        if (prefix := self._custom.get(snowflake_id)) is not None:
+            return prefix
+        if self._loaded or snowflake_id in self._defaults:
+            return self.DEFAULT
+
+        row = await self.bot.reads.fetchone(queries.PREFIX, (snowflake_id,))
+        if row is None or not row[0] or row[0] == self.DEFAULT:
+            self._defaults.add(snowflake_id)
+            return self.DEFAULT
+
+        self._custom[snowflake_id] = row[0]
+        return row[0]
+
+    async def refresh(self, snowflake_id: int):
+        """Re-reads a single guild's prefix, used when it was changed by another process."""
+        cur = await self.bot.db.execute(queries.PREFIX, (snowflake_id,))
+        row = await cur.fetchone()
+        self.set(snowflake_id, row[0] if row is not None and row[0] else self.DEFAULT)
+
+    def set(self, snowflake_id: int, prefix: str):
+        if prefix == self.DEFAULT:
+            self._custom.pop(snowflake_id, None)
+        else:
+            self._custom[snowflake_id] = prefix
+            self._defaults.discard(snowflake_id)
+
+    def match(self, prefix: str, content: str) -> Optional[str]:
+        """Returns the prefix as written in the message if the message starts with it."""
+        try:
+            lowered = self._lowered[prefix]
+        except KeyError:
+            lowered = self._lowered[prefix] = prefix.lower()
+
+        head = content[:len(prefix)]
+        if head.lower() == lowered:
+            return head
+        return None
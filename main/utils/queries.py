@@ -0,0 +1,38 @@
+from typing import *
+
+
+# The SQL of the hot paths, kept apart from the cogs (and their wavelink/discord imports)
+# so `Migrator.query_plans` and the tests check the exact statements that run.
+# Queries with an `IN ({})` list are formatted with `placeholders`.
+
+def placeholders(count: int) -> str:
+    return ', '.join('?' * count)
+
+
+PREFIX = "SELECT prefix FROM guild_config WHERE guild_id = ?"
+
+TAG = "SELECT tag_content FROM tags WHERE tag_guild_id = ? AND tag_name = ?"
+TAG_OWNER = "SELECT tag_author FROM tags WHERE tag_name = ? AND tag_guild_id = ?"
+
+DISABLED_COMMAND = "SELECT snowflake_id FROM disabled_commands WHERE command_name = ?"
+
+PLAYLIST_SELECT = """
+                  SELECT p.playlist_id, p.playlist_name, p.user_id,
+                      s.playlist_song, s.playlist_url, s.song_id,
+                      s.track_encoded, s.track_length, s.track_author, s.track_thumb
+                  FROM playlists AS p
+                  LEFT JOIN playlist_songs AS s ON s.playlist_id = p.playlist_id
+                  """
+USER_PLAYLISTS = f"{PLAYLIST_SELECT} WHERE p.user_id = ? ORDER BY p.playlist_id, s.song_id"
+PLAYLIST = f"{PLAYLIST_SELECT} WHERE p.playlist_id = ? ORDER BY s.song_id"
+PLAYLIST_OWNER = "SELECT user_id FROM playlists WHERE playlist_id = ?"
+REMOVE_SONGS = "DELETE FROM playlist_songs WHERE playlist_id = ? AND song_id IN ({})"
+BACKFILL_SONGS = "SELECT DISTINCT playlist_url FROM playlist_songs WHERE track_encoded IS NULL"
+
+TIMER_COLUMNS = ('id', 'expires', 'created', 'event', 'extra', 'author')
+DUE_TIMERS = f"SELECT {', '.join(TIMER_COLUMNS)} FROM timers WHERE expires_at < ? ORDER BY expires_at"
+DELETE_TIMERS = "DELETE FROM timers WHERE id IN ({})"
+
+TRACK_CACHE = "SELECT data, cached_at FROM track_cache WHERE query = ? AND cached_at >= ?"
+
+CACHE_EVENTS = "SELECT id, origin, namespace, key FROM cache_events WHERE id > ? ORDER BY id"
@@ -0,0 +1,210 @@
+import asyncio
+import random
+
+from collections import deque
+from typing import *
+
+
+class TrackQueue:
+    """
+    Indexable FIFO queue used by the music player.
+
+    Items are kept in small blocks with a Fenwick tree over the block sizes,
+    so finding position N is O(log n) and removing, inserting or moving a track
+    only shifts the items of a single block.
+    Slicing walks the blocks directly, which keeps paginating big queues cheap.
+    """
+
+    LOAD = 64
+
+    def __init__(self, iterable: Iterable = ()):
+        self._blocks: List[list] = []
+        self._tree: List[int] = [0]
+        self._size = 0
+        self._getters: Deque[asyncio.Future] = deque()
+
+        for item in iterable:
+            self.put_nowait(item)
+
+    # Fenwick tree helpers
+    def _build(self):
+        tree = [0] * (len(self._blocks) + 1)
+        for i, block in enumerate(self._blocks, start=1):
+            tree[i] += len(block)
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def _update(self, block: int, delta: int):
+        i = block + 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def _locate(self, index: int) -> Tuple[int, int]:
+        """Returns (block, offset) for an absolute position."""
+        pos = 0
+        step = 1 << (len(self._tree) - 1).bit_length()
+        while step:
+            nxt = pos + step
+            if nxt < len(self._tree) and self._tree[nxt] <= index:
+                pos = nxt
+                index -= self._tree[nxt]
+            step >>= 1
+        return pos, index
+
+    def _normalize(self, index: int) -> int:
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("queue index out of range")
+        return index
+
+    def _after_insert(self, block: int):
+        self._size += 1
+        if len(self._blocks[block]) > self.LOAD * 2:
+            half = self._blocks[block][self.LOAD:]
+            del self._blocks[block][self.LOAD:]
+            self._blocks.insert(block + 1, half)
+            self._build()
+        else:
+            self._update(block, 1)
+
+    def _after_remove(self, block: int):
+        self._size -= 1
+        if not self._blocks[block]:
+            del self._blocks[block]
+            self._build()
+        else:
+            self._update(block, -1)
+
+    def _wakeup(self):
+        while self._getters:
+            waiter = self._getters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                break
+
+    # Sequence API
+    def __len__(self):
+        return self._size
+
+    def __bool__(self):
+        return self._size > 0
+
+    def __iter__(self):
+        for block in self._blocks:
+            yield from block
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._size)
+            if step != 1:
+                return list(self)[index]
+            return self.slice(start, stop)
+
+        block, offset = self._locate(self._normalize(index))
+        return self._blocks[block][offset]
+
+    def __setitem__(self, index: int, item):
+        block, offset = self._locate(self._normalize(index))
+        self._blocks[block][offset] = item
+
+    def __delitem__(self, index: int):
+        self.pop(index)
+
+    def __repr__(self):
+        return f"<TrackQueue size={self._size}>"
+
+    def slice(self, start: int, stop: int) -> list:
+        """Returns the items in [start, stop) without touching the rest of the queue."""
+        start, stop = max(start, 0), min(stop, self._size)
+        if start >= stop:
+            return []
+
+        result = []
+        block, offset = self._locate(start)
+        while len(result) < stop - start:
+            chunk = self._blocks[block][offset:offset + (stop - start - len(result))]
+            result.extend(chunk)
+            block, offset = block + 1, 0
+        return result
+
+    def insert(self, index: int, item):
+        """Inserts an item before the given position."""
+        if index < 0:
+            index = max(index + self._size, 0)
+        if not self._blocks:
+            self._blocks.append([item])
+            self._build()
+            self._size += 1
+            self._wakeup()
+            return
+
+        if index >= self._size:
+            block = len(self._blocks) - 1
+            self._blocks[block].append(item)
+        else:
+            block, offset = self._locate(index)
+            self._blocks[block].insert(offset, item)
+        self._after_insert(block)
+        self._wakeup()
+
+    def pop(self, index: int = 0):
+        """Removes and returns the item at the given position (the head by default)."""
+        block, offset = self._locate(self._normalize(index))
+        item = self._blocks[block].pop(offset)
+        self._after_remove(block)
+        return item
+
+    def move(self, source: int, destination: int):
+        """Moves the item at `source` to `destination`."""
+        item = self.pop(source)
+        self.insert(destination, item)
+        return item
+
+    def shuffle(self):
+        items = list(self)
+        random.shuffle(items)
+        self._blocks = [items[i:i + self.LOAD] for i in range(0, len(items), self.LOAD)]
+        self._build()
+
+    def clear(self):
+        self._blocks = []
+        self._tree = [0]
+        self._size = 0
+
+    # Queue API
+    def put_nowait(self, item):
+        self.insert(self._size, item)
+
+    async def put(self, item):
+        self.put_nowait(item)
+
+    def extend(self, items: Iterable):
+        for item in items:
+            self.put_nowait(item)
+
+    def get_nowait(self):
+        if not self._size:
+            raise asyncio.QueueEmpty
+        return self.pop(0)
+
+    async def get(self):
+        """Removes and returns the head of the queue, waiting until an item is available."""
+        while not self._size:
+            waiter = asyncio.get_event_loop().create_future()
+            self._getters.append(waiter)
+            try:
+                await waiter
+            except:
+                waiter.cancel()
+                try:
+                    self._getters.remove(waiter)
+                except ValueError:
+                    pass
+                if self._size and not waiter.cancelled():
+                    self._wakeup()
+                raise
+        return self.get_nowait()
@@ -0,0 +1,182 @@
+import json
+import time
+import wavelink
+
+from collections import OrderedDict, deque
+from typing import *
+from utils import queries
+
+
+SEARCH_PREFIXES = ('ytsearch:', 'ytmsearch:', 'scsearch:')
+
+class TrackCache:
+    """
+    Caches Lavalink lookups, mapping a query/URL to the encoded track(s) and their info.
+    Hot entries live in an in-memory LRU, everything else in SQLite with a TTL,
+    so repeated plays build their tracks locally instead of going through Lavalink's REST API.
+    """
+
+    def __init__(self, bot, *, maxsize: int = 2048, ttl: int = 86400 * 3):
+        self.bot = bot
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._memory: OrderedDict = OrderedDict()
+        self._ready = False
+
+    async def _setup(self):
+        await self.bot.db.execute("DELETE FROM track_cache WHERE cached_at < ?", (int(time.time()) - self.ttl,))
+        self._ready = True
+
+    def _remember(self, query: str, cached_at: int, payload: dict):
+        self._memory[query] = (cached_at, payload)
+        self._memory.move_to_end(query)
+        while len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    @staticmethod
+    def _serialize(query: str, tracks) -> dict:
+        if isinstance(tracks, wavelink.TrackPlaylist):
+            return {"playlist": tracks.data}
+
+        # Searches are only ever used for their first result
+        if query.startswith(SEARCH_PREFIXES):
+            tracks = tracks[:1]
+        return {"tracks": [{"track": track.id, "info": track.info} for track in tracks]}
+
+    @staticmethod
+    def _build(payload: dict):
+        if "playlist" in payload:
+            return wavelink.TrackPlaylist(data=payload["playlist"])
+        return [wavelink.Track(track["track"], track["info"]) for track in payload["tracks"]]
+
+    async def lookup(self, query: str) -> Optional[dict]:
+        """Returns the cached payload for a query without ever hitting Lavalink."""
+        now = int(time.time())
+        if (entry := self._memory.get(query)) is not None:
+            if now - entry[0] < self.ttl:
+                self._memory.move_to_end(query)
+                return entry[1]
+            del self._memory[query]
+
+        if not self._ready:
+            await self._setup()
+
+        row = await self.bot.reads.fetchone(queries.TRACK_CACHE, (query, now - self.ttl))
+        if row is None:
+            return None
+
+        payload = json.loads(row[0])
+        self._remember(query, row[1], payload)
+        return payload
+
+    async def store(self, query: str, tracks):
+        payload = self._serialize(query, tracks)
+        now = int(time.time())
+        self._remember(query, now, payload)
+
+        if not self._ready:
+            await self._setup()
+        query_insert = "INSERT OR REPLACE INTO track_cache (query, data, cached_at) VALUES (?, ?, ?)"
+        self.bot.writes.enqueue(query_insert, (query, json.dumps(payload, separators=(',', ':')), now))
+
+    async def get_tracks(self, query: str):
+        """Drop-in replacement for `wavelink.Client.get_tracks` that goes through the cache first."""
+        if (payload := await self.lookup(query)) is not None:
+            return self._build(payload)
+
+        tracks = await self.bot.wavelink.get_tracks(query)
+        if tracks:
+            await self.store(query, tracks)
+        return tracks
+
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` failures within `window` seconds and half-opens again after `cooldown` seconds.
+    While half-open, traffic is let through; the next success closes the breaker and the next failure opens it again.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, *, threshold: int = 3, window: float = 60, cooldown: float = 300):
+        self.threshold = threshold
+        self.window = window
+        self.cooldown = cooldown
+
+        self._failures: Deque[float] = deque()
+        self._opened_at: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self._opened_at >= self.cooldown:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def failure(self):
+        now = time.monotonic()
+        if self.state == self.HALF_OPEN:
+            self._opened_at = now
+            return
+
+        self._failures.append(now)
+        while self._failures and now - self._failures[0] > self.window:
+            self._failures.popleft()
+        if len(self._failures) >= self.threshold:
+            self._opened_at = now
+
+    def success(self):
+        if self.state == self.HALF_OPEN:
+            self._opened_at = None
+            self._failures.clear()
+
+
+class SourceHealth:
+    """Circuit breakers per audio source, shared by every player."""
+
+    FALLBACKS = {'youtube': 'soundcloud'}
+    SEARCH_PREFIXES = {'youtube': 'ytsearch:', 'soundcloud': 'scsearch:'}
+
+    def __init__(self, **kwargs):
+        self._kwargs = kwargs
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    @staticmethod
+    def source_of(query: str) -> Optional[str]:
+        query = query or ''
+        if query.startswith(('ytsearch:', 'ytmsearch:')) or 'youtu' in query:
+            return 'youtube'
+        if query.startswith('scsearch:') or 'soundcloud.com' in query:
+            return 'soundcloud'
+        return None
+
+    def breaker(self, source: str) -> CircuitBreaker:
+        try:
+            return self._breakers[source]
+        except KeyError:
+            breaker = self._breakers[source] = CircuitBreaker(**self._kwargs)
+            return breaker
+
+    def is_open(self, source: Optional[str]) -> bool:
+        """Whether requests for this source should go straight to its fallback."""
+        return source in self._breakers and self._breakers[source].state == CircuitBreaker.OPEN
+
+    def is_healthy(self, source: Optional[str]) -> bool:
+        return source not in self._breakers or self._breakers[source].state == CircuitBreaker.CLOSED
+
+    def failure(self, source: Optional[str]):
+        if source is not None:
+            self.breaker(source).failure()
+
+    def success(self, source: Optional[str]):
+        if source in self._breakers:
+            self._breakers[source].success()
+
+    def fallback_search(self, source: str, title: str) -> Optional[str]:
+        """The search query to use on the fallback source of `source`."""
+        if (fallback := self.FALLBACKS.get(source)) is None:
+            return None
+        return f"{self.SEARCH_PREFIXES[fallback]}{title}"
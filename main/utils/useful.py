@@ -76,9 +76,10 @@ class ListCall(list):
     def append(self, rhs):
         return super().append(rhs)
 
-    def call(self, *args, **kwargs):
+    def call(self, *args, return_exceptions=False, **kwargs):
         return asyncio.gather(
-            *(maybe_coroutine(func, *args, **kwargs) for func in self)
+            *(maybe_coroutine(func, *args, **kwargs) for func in self),
+            return_exceptions=return_exceptions
         )
 
 class Embed(discord.Embed):
@@ -166,6 +167,16 @@ def get_title(track, length=35):
     return track
 
 
+def convert(ms):
+    seconds, milliseconds = divmod(ms, 1000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+
+    result = [hours, minutes, seconds]
+    format_result = [f"0{i}" if len(str(i)) == 1 else str(i) for i in result]
+    return ":".join(format_result).removeprefix("00:").removesuffix(":")
+
+
 def event_check(func):
     """Event decorator check."""
 
@@ -0,0 +1,46 @@
+import discord
+
+from typing import *
+
+
+class VoiceIndex:
+    """
+    Listeners of the voice channel the bot is connected to, per guild.
+    Kept up to date from voice state events so vote counts and DJ candidates
+    never need a scan of the channel's members. Members are kept in join order.
+    """
+
+    def __init__(self):
+        self._guilds: Dict[int, Tuple[int, Dict[int, None]]] = {}
+
+    def __contains__(self, guild_id: int):
+        return guild_id in self._guilds
+
+    def track(self, channel: discord.VoiceChannel):
+        """Starts (or restarts) indexing a guild from the channel the bot is in."""
+        self._guilds[channel.guild.id] = (channel.id, dict.fromkeys(m.id for m in channel.members if not m.bot))
+
+    def forget(self, guild_id: int):
+        self._guilds.pop(guild_id, None)
+
+    def listeners(self, guild_id: int) -> int:
+        return len(self._guilds[guild_id][1]) if guild_id in self._guilds else 0
+
+    def is_listening(self, guild_id: int, member_id: int) -> bool:
+        return guild_id in self._guilds and member_id in self._guilds[guild_id][1]
+
+    def candidates(self, guild_id: int, *, exclude: int = None) -> Iterator[int]:
+        """Member IDs that could become DJ, longest-listening first."""
+        return (m for m in self._guilds.get(guild_id, (None, {}))[1] if m != exclude)
+
+    def update(self, member: discord.Member, before: discord.VoiceState, after: discord.VoiceState):
+        """Applies a (non-bot) member's voice state change."""
+        try:
+            channel_id, members = self._guilds[member.guild.id]
+        except KeyError:
+            return
+
+        if getattr(after.channel, 'id', None) == channel_id:
+            members.setdefault(member.id, None)
+        else:
+            members.pop(member.id, None)
@@ -0,0 +1,141 @@
+import asyncio
+import statistics
+import time
+
+from collections import deque
+from typing import *
+
+from utils.database import connect_writer
+
+
+class WriteBehind:
+    """
+    Queues fire-and-forget writes and applies them in a single transaction.
+
+    A batch is flushed once `max_batch` statements are pending or every `interval` seconds,
+    whichever comes first. Consecutive statements with the same SQL go through `executemany`
+    inside one BEGIN ... COMMIT, instead of a round-trip (and commit) per statement.
+    Batches run on a connection of their own, opened with `open`: writes made on `bot.db`
+    in the meantime wait for the batch to commit instead of joining its transaction.
+    Use `bot.db` directly for writes whose result (rowcount, lastrowid, ...) is needed.
+    """
+
+    def __init__(self, bot, *, max_batch: int = 256, interval: float = 2):
+        self.bot = bot
+        self.max_batch = max_batch
+        self.interval = interval
+
+        self.flushes = 0
+        self.statements = 0
+        self.failures = 0
+        self._latencies: Deque[float] = deque(maxlen=256)
+
+        self.db = None
+        self._pending: List[Tuple[str, tuple]] = []
+        self._lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._task = None
+
+    def __len__(self):
+        return len(self._pending)
+
+    def enqueue(self, query: str, params: Iterable = ()):
+        self._pending.append((query, tuple(params)))
+        if len(self._pending) >= self.max_batch:
+            self._wakeup.set()
+
+    def enqueue_many(self, query: str, rows: Iterable[Iterable]):
+        for params in rows:
+            self.enqueue(query, params)
+
+    @staticmethod
+    def _group(batch: List[Tuple[str, tuple]]) -> List[Tuple[str, List[tuple]]]:
+        groups = []
+        for query, params in batch:
+            if groups and groups[-1][0] == query:
+                groups[-1][1].append(params)
+            else:
+                groups.append((query, [params]))
+        return groups
+
+    async def open(self, path: str):
+        self.db = await connect_writer(path)
+
+    async def _apply(self, batch: List[Tuple[str, tuple]]):
+        db = self.db
+        await db.execute("BEGIN IMMEDIATE")
+        try:
+            for query, rows in self._group(batch):
+                if len(rows) == 1:
+                    await db.execute(query, rows[0])
+                else:
+                    await db.executemany(query, rows)
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            self.bot.logger.warning(f"Write batch of {len(batch)} statements failed ({e}), retrying one by one")
+
+            # Keep every statement that is fine on its own, drop (and log) the broken ones.
+            # A failing statement is rolled back on its own, the transaction carries on
+            await db.execute("BEGIN IMMEDIATE")
+            for query, params in batch:
+                try:
+                    await db.execute(query, params)
+                except Exception as e:
+                    self.failures += 1
+                    self.bot.logger.error(f"Dropped write {query.strip()!r} {params!r}: {e}")
+            await db.commit()
+
+    async def flush(self):
+        """Applies and commits everything that is pending."""
+        async with self._lock:
+            batch, self._pending = self._pending, []
+            self._wakeup.clear()
+
+            started = time.perf_counter()
+            if batch:
+                await self._apply(batch)
+
+            self._latencies.append(time.perf_counter() - started)
+            self.flushes += 1
+            self.statements += len(batch)
+
+    async def run(self):
+        while not self.bot.is_closed():
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+            try:
+                await self.flush()
+            except Exception as e:
+                self.bot.logger.error(f"Could not flush pending writes: {e}")
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = self.bot.loop.create_task(self.run())
+
+    async def close(self):
+        """Stops the flush loop, writes whatever is still pending and closes the connection."""
+        if self._task is not None:
+            self._task.cancel()
+        await self.flush()
+        if self.db is not None:
+            await self.db.close()
+            self.db = None
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        latencies = sorted(self._latencies)
+        return {
+            "pending": len(self._pending),
+            "flushes": self.flushes,
+            "statements": self.statements,
+            "failures": self.failures,
+            "latency_ms": {
+                "mean": round(statistics.fmean(latencies) * 1000, 2),
+                "p95": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 2),
+                "max": round(latencies[-1] * 1000, 2)
+            } if latencies else None
+        }